@@ -2,14 +2,18 @@
 import sys
 import subprocess
 import os
+from functools import lru_cache
+from importlib import invalidate_caches
+from importlib.util import find_spec
 from qgis.PyQt.QtWidgets import QMessageBox
 from qgis.core import Qgis, QgsMessageLog
 
 # Qt Enum Compatibility
-if hasattr(QMessageBox, "Yes"):
-    QMessageBox_Yes = QMessageBox.Yes
-    QMessageBox_No = QMessageBox.No
-else:
+# getattr with a default avoids the AttributeError raised (and swallowed)
+# by hasattr() on Qt6, where the unscoped enum members no longer exist.
+QMessageBox_Yes = getattr(QMessageBox, "Yes", None)
+QMessageBox_No = getattr(QMessageBox, "No", None)
+if QMessageBox_Yes is None:
     QMessageBox_Yes = QMessageBox.StandardButton.Yes
     QMessageBox_No = QMessageBox.StandardButton.No
 
@@ -34,47 +38,53 @@ def get_ezdxf_requirement():
     except Exception:
         return "ezdxf<1.1"
 
-def check_missing():
+@lru_cache(maxsize=1)
+def _probe_missing():
     missing = []
-    try:
-        import fitz
-        # Verify it's the correct fitz (PyMuPDF) and not another package named fitz
-        if not hasattr(fitz, 'open'):
-             missing.append('pymupdf')
-    except ImportError:
+    # Modules already in sys.modules (e.g. after a plugin reload) are used
+    # as-is. Otherwise find_spec() reports an uninstalled package without
+    # running an import. Installed packages are still imported: fitz has to
+    # be verified as PyMuPDF and ezdxf can fail at import time against an
+    # old numpy.
+    fitz = sys.modules.get('fitz')
+    if fitz is None and find_spec('fitz') is not None:
+        try:
+            import fitz
+        except ImportError:
+            fitz = None
+    # Verify it's the correct fitz (PyMuPDF) and not another package named fitz.
+    # A plain dict lookup; hasattr() would go through module __getattr__.
+    if fitz is None or 'open' not in vars(fitz):
         missing.append('pymupdf')
-    
-    try:
-        import ezdxf
-    except ImportError:
-        missing.append(get_ezdxf_requirement())
-    except AttributeError:
-        # Catch the numpy.typing error if it happens during import
-        missing.append(get_ezdxf_requirement())
-    except Exception:
-        missing.append(get_ezdxf_requirement())
-    
-    return missing
 
-def install_deps(iface):
-    missing = check_missing()
-    if not missing:
-        return True
+    if 'ezdxf' not in sys.modules:
+        if find_spec('ezdxf') is None:
+            missing.append(get_ezdxf_requirement())
+        else:
+            try:
+                import ezdxf
+            except (ImportError, OSError):
+                # OSError covers a broken compiled extension
+                missing.append(get_ezdxf_requirement())
+            except AttributeError:
+                # Catch the numpy.typing error if it happens during import
+                missing.append(get_ezdxf_requirement())
 
-    # Ask user for permission
-    reply = QMessageBox.question(
-        iface.mainWindow(),
-        'Missing Dependencies',
-        f"The PDF to DXF plugin requires the following libraries:\n{', '.join(missing)}\n\n"
-        "Do you want to install them automatically?",
-        QMessageBox_Yes | QMessageBox_No,
-        QMessageBox_Yes
-    )
+    return tuple(missing)
 
-    if reply == QMessageBox_No:
-        return False
+def check_missing():
+    """
+    Return the pip requirements for missing dependencies.
+    The probe imports fitz/ezdxf, so its result is memoized; callers get
+    a fresh list they are free to modify.
+    """
+    return list(_probe_missing())
 
-    # Locate python executable
+def python_executable():
+    """
+    Locate the Python interpreter QGIS runs on.
+    On Windows sys.executable is the QGIS binary itself, not python.exe.
+    """
     python_exe = None
     if sys.platform == 'win32':
         candidates = [
@@ -95,6 +105,28 @@ def install_deps(iface):
         else:
             python_exe = os.path.join(sys.exec_prefix, 'python.exe')
 
+    return python_exe
+
+def install_deps(iface):
+    missing = check_missing()
+    if not missing:
+        return True
+
+    # Ask user for permission
+    reply = QMessageBox.question(
+        iface.mainWindow(),
+        'Missing Dependencies',
+        f"The PDF to DXF plugin requires the following libraries:\n{', '.join(missing)}\n\n"
+        "Do you want to install them automatically?",
+        QMessageBox_Yes | QMessageBox_No,
+        QMessageBox_Yes
+    )
+
+    if reply == QMessageBox_No:
+        return False
+
+    python_exe = python_executable()
+
     QgsMessageLog.logMessage(f"PDF2DXF: Using python: {python_exe}", "PDF2DXF", Qgis.Info)
 
     try:
@@ -105,7 +137,11 @@ def install_deps(iface):
         QgsMessageLog.logMessage(f"PDF2DXF: Running {cmd}", "PDF2DXF", Qgis.Info)
         
         subprocess.check_call(cmd)
-        
+        # pip just added packages to site-packages; the import system's
+        # directory caches are the only ones that need to be invalidated.
+        invalidate_caches()
+        _probe_missing.cache_clear()
+
         QMessageBox.information(
             iface.mainWindow(),
             "Success",
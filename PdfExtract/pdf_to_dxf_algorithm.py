@@ -15,7 +15,8 @@ from qgis.core import (QgsProcessing,
                        QgsVectorFileWriter,
                        QgsFeature,
                        QgsGeometry,
-                       QgsPointXY,
+                       QgsPoint,
+                       QgsLineString,
                        QgsField,
                        QgsFields,
                        QgsCoordinateReferenceSystem,
@@ -26,22 +27,21 @@ from qgis.utils import iface
 from qgis.PyQt.QtCore import QVariant
 import sys
 import os
+from functools import partial
+from .dependencies import check_missing, python_executable
+from .pdf_to_dxf_worker import (MIN_CURVE_SEGMENTS, dxf_page_worker,
+                                 extract_page_worker, item_points_func,
+                                 map_pages, place_shapes, transform_points)
 
-# dependency list handled by caller/plugin initializer
-MISSING_DEPS = []
-try:
-    import fitz
-    if not hasattr(fitz, 'open'):
-        MISSING_DEPS.append('pymupdf')
-except ImportError:
-    MISSING_DEPS.append('pymupdf')
+# Features handed to QgsVectorFileWriter.addFeatures() per call
+WRITE_BATCH_SIZE = 10000
 
-try:
-    import ezdxf
-except ImportError:
-    MISSING_DEPS.append('ezdxf')
-except Exception:
-    MISSING_DEPS.append('ezdxf')
+
+def __getattr__(name):
+    # dependency list handled by caller/plugin initializer
+    if name == 'MISSING_DEPS':
+        return check_missing()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class PdfToDxfAlgorithm(QgsProcessingAlgorithm):
@@ -52,6 +52,16 @@ class PdfToDxfAlgorithm(QgsProcessingAlgorithm):
     LOAD_OUTPUT = 'LOAD_OUTPUT'
     MIN_SIZE = 'MIN_SIZE'
     SKIP_CURVES = 'SKIP_CURVES'
+    BINARY_DXF = 'BINARY_DXF'
+    BEZIER_SEGMENTS = 'BEZIER_SEGMENTS'
+    STREAM_DXF = 'STREAM_DXF'
+
+    # OUTPUT_FORMAT index -> (extension, OGR driver)
+    FORMATS = [
+        ('.shp', 'ESRI Shapefile'),
+        ('.geojson', 'GeoJSON'),
+        ('.dxf', 'DXF'),
+    ]
 
     def tr(self, string):
         return QCoreApplication.translate('Processing', string)
@@ -125,6 +135,32 @@ class PdfToDxfAlgorithm(QgsProcessingAlgorithm):
             )
         )
 
+        self.addParameter(
+            QgsProcessingParameterBoolean(
+                self.BINARY_DXF,
+                self.tr('Write binary DXF (smaller, faster; not read by older GDAL or many CAD tools)'),
+                defaultValue=False
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.BEZIER_SEGMENTS,
+                self.tr('Minimum DXF curve segments (0 keeps curves as splines)'),
+                type=QgsProcessingParameterNumber.Integer,
+                defaultValue=MIN_CURVE_SEGMENTS,
+                minValue=0
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterBoolean(
+                self.STREAM_DXF,
+                self.tr('Stream DXF as R12 (low memory; no splines or layer table)'),
+                defaultValue=False
+            )
+        )
+
         self.addParameter(
             QgsProcessingParameterNumber(
                 self.MIN_SIZE,
@@ -153,9 +189,10 @@ class PdfToDxfAlgorithm(QgsProcessingAlgorithm):
         return True
 
     def processAlgorithm(self, parameters, context, feedback):
-        if MISSING_DEPS:
+        missing_deps = check_missing()
+        if missing_deps:
             raise QgsProcessingException(
-                self.tr(f"Missing dependencies: {', '.join(MISSING_DEPS)}.\n\n"
+                self.tr(f"Missing dependencies: {', '.join(missing_deps)}.\n\n"
                         "The plugin attempts to install these automatically.\n"
                         "If that failed, please install manually using OSGeo4W Shell:\n"
                         "pip install pymupdf ezdxf\n"
@@ -171,6 +208,15 @@ class PdfToDxfAlgorithm(QgsProcessingAlgorithm):
         min_size = self.parameterAsDouble(parameters, self.MIN_SIZE, context)
         skip_curves = self.parameterAsBool(
             parameters, self.SKIP_CURVES, context)
+        ascii_dxf = not self.parameterAsBool(
+            parameters, self.BINARY_DXF, context)
+        bezier_segments = self.parameterAsInt(
+            parameters, self.BEZIER_SEGMENTS, context)
+        stream_dxf = self.parameterAsBool(
+            parameters, self.STREAM_DXF, context)
+        # this runs on a worker thread, so the writers take the context's
+        # copy of the transform context rather than the project's
+        self.transform_context = context.transformContext()
 
         if not source_path:
             raise QgsProcessingException(self.tr('Invalid input PDF.'))
@@ -180,15 +226,9 @@ class PdfToDxfAlgorithm(QgsProcessingAlgorithm):
 
         # Ensure output has correct extension
         base_path = os.path.splitext(output_path)[0]
-        if output_format == 0:  # Shapefile
-            output_path = base_path + \
-                '.shp' if not output_path.lower().endswith('.shp') else output_path
-        elif output_format == 1:  # GeoJSON
-            output_path = base_path + \
-                '.geojson' if not output_path.lower().endswith('.geojson') else output_path
-        else:  # DXF
-            output_path = base_path + \
-                '.dxf' if not output_path.lower().endswith('.dxf') else output_path
+        ext = self.FORMATS[output_format][0]
+        if not output_path.lower().endswith(ext):
+            output_path = base_path + ext
 
         # Create parent directory if needed
         out_dir = os.path.dirname(output_path)
@@ -223,23 +263,31 @@ class PdfToDxfAlgorithm(QgsProcessingAlgorithm):
             f"Using CRS: {project_crs.authid()} - {project_crs.description()}")
 
         try:
+            # check_missing() has already verified this is PyMuPDF's fitz
             import fitz
-            if not hasattr(fitz, 'open'):
-                raise ImportError(
-                    "Incorrect 'fitz' package installed. Please install 'pymupdf'.")
-
-            generated_files = self.convert_pdf_to_vector(
-                source_path,
-                output_path,
-                fitz,
-                project_crs,
-                output_format,
-                output_format,
-                feedback,
-                canvas_extent,
-                min_size,
-                skip_curves
-            )
+
+            if not os.path.exists(source_path):
+                raise FileNotFoundError(f"PDF file not found: {source_path}")
+
+            # Opened once here; only pool workers open their own copy
+            doc = fitz.open(source_path)
+            try:
+                generated_files = self.convert_pdf_to_vector(
+                    source_path,
+                    output_path,
+                    doc,
+                    project_crs,
+                    output_format,
+                    feedback,
+                    canvas_extent,
+                    min_size,
+                    skip_curves,
+                    ascii_dxf,
+                    bezier_segments,
+                    stream_dxf
+                )
+            finally:
+                doc.close()
 
             if load_output and generated_files:
                 for file_path, layer_name in generated_files:
@@ -264,230 +312,99 @@ class PdfToDxfAlgorithm(QgsProcessingAlgorithm):
 
         return {self.OUTPUT: output_path}
 
-    def convert_pdf_to_vector(self, pdf_path, output_path, fitz, crs, output_format, feedback, canvas_extent=None, min_size=0.0, skip_curves=False):
-        if not os.path.exists(pdf_path):
-            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
-
-        doc = fitz.open(pdf_path)
+    def convert_pdf_to_vector(self, pdf_path, output_path, doc, crs, output_format, feedback, canvas_extent=None, min_size=0.0, skip_curves=False, ascii_dxf=True, bezier_segments=0, stream_dxf=False):
+        # doc is the already opened pdf_path; pool workers reopen the file
+        # by path, pages converted in this process use doc directly
+        page_count = len(doc)
         generated_files = []
 
         # Determine output extension and driver
-        if output_format == 0:  # Shapefile
-            ext = '.shp'
-            driver = 'ESRI Shapefile'
-        elif output_format == 1:  # GeoJSON
-            ext = '.geojson'
-            driver = 'GeoJSON'
-        else:  # DXF
-            ext = '.dxf'
-            driver = 'DXF'
+        ext, driver = self.FORMATS[output_format]
 
         # Multi-page -> separate files per page
         base, _ = os.path.splitext(output_path)
+        python_exe = python_executable()
 
         # If DXF, we can use direct conversion
-        if output_format == 2:  # DXF
-            if len(doc) > 1:
-                for page_num in range(len(doc)):
-                    page = doc[page_num]
-                    dxf_path = f"{base}_page_{page_num + 1}{ext}"
-                    ok, msg = self.convert_pdf_page_to_dxf_direct(
-                        page, dxf_path, min_size=min_size, skip_curves=skip_curves)
-                    if ok:
-                        generated_files.append(
-                            (dxf_path, f"Page {page_num + 1} - DXF"))
-                    else:
-                        feedback.pushWarning(
-                            f"DXF conversion failed for page {page_num + 1}: {msg}")
+        if driver == 'DXF':
+            if page_count == 0:
+                feedback.pushWarning("PDF document contains no pages.")
+                return generated_files
+
+            if page_count > 1:
+                outputs = [(f"{base}_page_{n + 1}{ext}", f"Page {n + 1} - DXF")
+                           for n in range(page_count)]
             else:
-                dxf_path = f"{base}{ext}"
-                if len(doc) > 0:
-                    ok, msg = self.convert_pdf_page_to_dxf_direct(
-                        doc[0], dxf_path, min_size=min_size, skip_curves=skip_curves)
-                    if ok:
-                        generated_files.append((dxf_path, "PDF DXF"))
-                    else:
-                        feedback.pushWarning(f"DXF conversion failed: {msg}")
+                outputs = [(f"{base}{ext}", "PDF DXF")]
+
+            tasks = [(pdf_path, n, outputs[n][0], min_size, skip_curves, ascii_dxf,
+                      bezier_segments, None, stream_dxf, True, True)
+                     for n in range(page_count)]
+            for page_num, ok, msg in map_pages(dxf_page_worker, tasks, python_exe, feedback.isCanceled, {pdf_path: doc}):
+                if ok:
+                    generated_files.append(outputs[page_num])
+                elif page_count > 1:
+                    feedback.pushWarning(
+                        f"DXF conversion failed for page {page_num + 1}: {msg}")
                 else:
-                    feedback.pushWarning("PDF document contains no pages.")
+                    feedback.pushWarning(f"DXF conversion failed: {msg}")
+                feedback.setProgress(100.0 * (page_num + 1) / page_count)
 
             return generated_files
 
-        # For Shapefile/GeoJSON
-        if len(doc) > 1:
-            for page_num in range(len(doc)):
-                page = doc[page_num]
+        # For Shapefile/GeoJSON: extraction runs in the workers, the QGIS
+        # writers stay in this process
+        if page_count == 0:
+            feedback.pushWarning("PDF document contains no pages.")
+            generated_files.append((f"{base}_geometry{ext}", "PDF Geometry"))
+            generated_files.append((f"{base}_text{ext}", "PDF Text"))
+            return generated_files
+
+        tasks = [(pdf_path, n, None, True, True, min_size) for n in range(page_count)]
+        for page_num, page_data in map_pages(extract_page_worker, tasks, python_exe, feedback.isCanceled, {pdf_path: doc}):
+            if page_count > 1:
                 geom_path = f"{base}_page_{page_num + 1}_geometry{ext}"
                 text_path = f"{base}_page_{page_num + 1}_text{ext}"
+                geom_name = f"Page {page_num + 1} - Geometry"
+                text_name = f"Page {page_num + 1} - Text"
+            else:
+                geom_path = f"{base}_geometry{ext}"
+                text_path = f"{base}_text{ext}"
+                geom_name = "PDF Geometry"
+                text_name = "PDF Text"
+
+            # Text-only or drawing-only pages get just the layer they need;
+            # a layer without features is never created
+            if page_data["items"] and self._create_geometry_layer(
+                    page_data, geom_path, crs, driver, feedback, canvas_extent, min_size, skip_curves):
+                generated_files.append((geom_path, geom_name))
+            else:
+                feedback.pushInfo(
+                    f"Page {page_num + 1} has no geometry to write, skipping geometry layer.")
 
-                self._create_geometry_layer(
-                    page, geom_path, crs, driver, feedback, canvas_extent, min_size, skip_curves)
-                self._create_text_layer(
-                    page, text_path, crs, driver, feedback, canvas_extent)
-
-                generated_files.append(
-                    (geom_path, f"Page {page_num + 1} - Geometry"))
-                generated_files.append(
-                    (text_path, f"Page {page_num + 1} - Text"))
-        else:
-            # Single page or empty doc
-            geom_path = f"{base}_geometry{ext}"
-            text_path = f"{base}_text{ext}"
-            if len(doc) > 0:
-                self._create_geometry_layer(
-                    doc[0], geom_path, crs, driver, feedback, canvas_extent, min_size, skip_curves)
-                self._create_text_layer(
-                    doc[0], text_path, crs, driver, feedback, canvas_extent)
+            if page_data["spans"] and self._create_text_layer(
+                    page_data, text_path, crs, driver, feedback, canvas_extent):
+                generated_files.append((text_path, text_name))
             else:
-                feedback.pushWarning("PDF document contains no pages.")
-            generated_files.append((geom_path, "PDF Geometry"))
-            generated_files.append((text_path, "PDF Text"))
+                feedback.pushInfo(
+                    f"Page {page_num + 1} has no text to write, skipping text layer.")
+            feedback.setProgress(100.0 * (page_num + 1) / page_count)
 
         return generated_files
 
-    def convert_pdf_page_to_dxf_direct(self, page, output_dxf_path, min_size=0.0, skip_curves=False):
-        """Convert PDF page directly to DXF using ezdxf (better quality)."""
-        try:
-            import ezdxf
-        except ImportError:
-            return False, "ezdxf not installed"
-
-        try:
-            dxf = ezdxf.new()
-            # Create layers
-            dxf.layers.new(name='PDF_GEOMETRY', dxfattribs={'color': 7})
-            dxf.layers.new(name='PDF_TEXT', dxfattribs={'color': 1})
-
-            msp = dxf.modelspace()
-            page_height = page.rect.height
-
-            # 1. Extract Drawings
-            paths = page.get_drawings()
-
-            for path in paths:
-                for item in path.get("items", []):
-                    try:
-                        cmd = item[0]
-                        if isinstance(cmd, bytes):
-                            cmd = cmd.decode("utf-8", "ignore")
-
-                        # Size Filter
-                        pass_size = True
-                        if min_size > 0:
-                            w, h = 0, 0
-                            if str(cmd).lower() == "l":
-                                p1, p2 = item[1], item[2]
-                                w = abs(p1[0] - p2[0])
-                                h = abs(p1[1] - p2[1])
-                            elif str(cmd).lower() == "c":
-                                xs = [pt[0] for pt in item[1:] if pt]
-                                ys = [pt[1] for pt in item[1:] if pt]
-                                if xs and ys:
-                                    w = max(xs) - min(xs)
-                                    h = max(ys) - min(ys)
-                            elif str(cmd).lower() in ("re", "rect"):
-                                rect = item[1]
-                                w, h = rect.width, rect.height
-
-                            if max(w, h) < min_size:
-                                pass_size = False
-
-                        if not pass_size:
-                            continue
-
-                        # LINE
-                        if str(cmd).lower() == "l":
-                            p1 = item[1]
-                            p2 = item[2]
-                            msp.add_line(
-                                (p1[0], page_height - p1[1]),
-                                (p2[0], page_height - p2[1]),
-                                dxfattribs={'layer': 'PDF_GEOMETRY'}
-                            )
-
-                        # CURVE
-                        elif str(cmd).lower() == "c":
-                            if skip_curves:
-                                continue
-
-                            control_points = []
-                            for pt in item[1:]:
-                                control_points.append(
-                                    (pt[0], page_height - pt[1]))
-                            if len(control_points) >= 2:
-                                msp.add_spline(control_points, degree=3, dxfattribs={
-                                               'layer': 'PDF_GEOMETRY'})
-
-                        # RECTANGLE
-                        elif str(cmd).lower() in ("re", "rect"):
-                            rect = item[1]
-                            points = [
-                                (rect.x0, page_height - rect.y0),
-                                (rect.x1, page_height - rect.y0),
-                                (rect.x1, page_height - rect.y1),
-                                (rect.x0, page_height - rect.y1),
-                                (rect.x0, page_height - rect.y0)
-                            ]
-                            msp.add_lwpolyline(points, dxfattribs={
-                                               'layer': 'PDF_GEOMETRY'})
-
-                    except Exception:
-                        continue
-
-            # 2. Extract Text
-            try:
-                text_dict = page.get_text("dict")
-            except Exception:
-                text_dict = {}
-
-            for block in text_dict.get("blocks", []):
-                if block.get("type") != 0:
-                    continue
-                for line in block.get("lines", []):
-                    for span in line.get("spans", []):
-                        try:
-                            text = span.get("text", "").strip()
-                            if not text:
-                                continue
-
-                            size = span.get("size", 10)
-                            origin = span.get("origin", (0, 0))
-                            insert_point = (origin[0], page_height - origin[1])
-
-                            msp.add_mtext(
-                                text,
-                                dxfattribs={
-                                    'char_height': size,
-                                    'insert': insert_point,
-                                    'attachment_point': 7,  # BottomLeft
-                                    'layer': 'PDF_TEXT'
-                                }
-                            )
-                        except Exception:
-                            continue
-
-            dxf.saveas(output_dxf_path)
-            return True, None
-
-        except Exception as e:
-            return False, str(e)
-
-    def _create_geometry_layer(self, page, output_path, crs, driver, feedback, canvas_extent=None, min_size=0.0, skip_curves=False):
-        """Create a vector layer for PDF geometry (lines, curves, rectangles)"""
+    def _create_geometry_layer(self, page_data, output_path, crs, driver, feedback, canvas_extent=None, min_size=0.0, skip_curves=False):
+        """
+        Create a vector layer for PDF geometry (lines, curves, rectangles).
+        Returns the number of features written; no file is created for 0.
+        """
         # Minimal, shapefile-friendly field names
         fields = QgsFields()
         fields.append(QgsField("id", QVariant.Int))
         # shorter name for shapefile compatibility
         fields.append(QgsField("gtype", QVariant.String))
 
-        page_width = getattr(page, "rect", None).width if getattr(
-            page, "rect", None) else None
-        page_height = getattr(page, "rect", None).height if getattr(
-            page, "rect", None) else None
-
-        if page_width is None or page_height is None:
-            raise QgsProcessingException(
-                "Unable to determine page dimensions from PyMuPDF page object.")
+        page_width = page_data["width"]
+        page_height = page_data["height"]
 
         feedback.pushInfo(
             f"Page dimensions: {page_width} x {page_height} points")
@@ -507,172 +424,60 @@ class PdfToDxfAlgorithm(QgsProcessingAlgorithm):
             offset_y = 0.0
             feedback.pushInfo("No canvas extent, placing PDF at origin (0, 0)")
 
-        # Ensure parent dir exists
-        parent = os.path.dirname(output_path)
-        if parent and not os.path.exists(parent):
-            os.makedirs(parent, exist_ok=True)
+        # The writer is only created once there is a feature to write
+        writer = None
+        open_writer = partial(self._open_writer, output_path, fields,
+                              QgsWkbTypes.LineString, crs, driver, "geometry")
+
+        # Collect the raw points of every feature first so the Y flip and
+        # offset are applied to the whole page in one pass.
+        # items were flattened to plain tuples by extract_page()
+        shapes = []  # (gtype, start, end) slices into coords
+        coords = []
+        # the size filter runs in place_shapes(), compiled with numba if present
+        points = item_points_func(0.0, skip_curves)
+        extend_coords = coords.extend
+        add_shape = shapes.append
+        for item in page_data["items"]:
+            shape = points(item)
+            if shape is None:
+                continue
+            gtype, pts = shape
 
-        # Create writer
-        try:
-            writer = QgsVectorFileWriter(
-                output_path,
-                "UTF-8",
-                fields,
-                QgsWkbTypes.LineString,
-                crs,
-                driver
-            )
-        except TypeError:
-            # In case of QGIS API differences, try alternate signature
-            try:
-                writer = QgsVectorFileWriter(
-                    output_path, fields, QgsWkbTypes.LineString, crs, driver)
-            except Exception as e:
-                raise Exception(f"Error creating geometry layer writer: {e}")
+            start = len(coords)
+            extend_coords(pts)  # already (x, y) pairs, see item_points_func()
+            add_shape((gtype, start, len(coords)))
 
-        # If writer reports error, raise
-        try:
-            err = writer.hasError() if hasattr(writer, 'hasError') else None
-            if err is not None and err != QgsVectorFileWriter.NoError:
-                msg = writer.errorMessage() if hasattr(
-                    writer, 'errorMessage') else "Unknown writer error"
-                raise Exception(f"Error creating geometry layer: {msg}")
-        except Exception:
-            # proceed — some QGIS versions don't expose hasError in same way
-            pass
-
-        paths = []
-        try:
-            # fitz page.get_drawings() sometimes returns None or empty
-            paths = page.get_drawings() or []
-        except Exception as e:
-            feedback.pushWarning(f"Could not extract drawings from page: {e}")
-            paths = []
+        shapes, xs, ys = place_shapes(
+            coords, shapes, page_height, offset_x, offset_y, min_size)
 
         feature_id = 0
-        for path in paths:
-            # path is usually a dict with key "items"
-            items = path.get("items", []) if isinstance(path, dict) else []
-            for item in items:
-                if not item:
-                    continue
-                cmd = item[0]
-                # safe decode for bytes
-                if isinstance(cmd, bytes):
-                    try:
-                        cmd = cmd.decode('utf-8', errors='ignore')
-                    except Exception:
-                        cmd = str(cmd)
-                else:
-                    cmd = str(cmd)
-
-                # Size Filter
-                pass_size = True
-                if min_size > 0:
-                    w, h = 0, 0
-                    if str(cmd).lower() == "l":
-                        p1, p2 = item[1], item[2]
-                        w = abs(p1[0] - p2[0])
-                        h = abs(p1[1] - p2[1])
-                    elif str(cmd).lower() == "c":
-                        xs = [pt[0] for pt in item[1:] if pt]
-                        ys = [pt[1] for pt in item[1:] if pt]
-                        if xs and ys:
-                            w = max(xs) - min(xs)
-                            h = max(ys) - min(ys)
-                    elif str(cmd).lower() in ("re", "rect"):
-                        rect = item[1]
-                        w, h = rect.width, rect.height
-
-                    if max(w, h) < min_size:
-                        pass_size = False
-
-                if not pass_size:
-                    continue
-
-                try:
-                    feature = QgsFeature(fields)
-                    feature.setAttribute("id", feature_id)
-
-                    if cmd == 'l' or cmd.lower() == 'l':  # line
-                        # item[1], item[2] are points
-                        p1 = item[1]
-                        p2 = item[2]
-                        pt1 = self._simple_transform(
-                            p1, page_height, offset_x, offset_y)
-                        pt2 = self._simple_transform(
-                            p2, page_height, offset_x, offset_y)
-                        geom = QgsGeometry.fromPolylineXY(
-                            [QgsPointXY(pt1[0], pt1[1]), QgsPointXY(pt2[0], pt2[1])])
-                        feature.setGeometry(geom)
-                        feature.setAttribute("gtype", "line")
-                        writer.addFeature(feature)
-                        feature_id += 1
-
-                    elif cmd == 'c' or cmd.lower() == 'c':  # curve (bezier segment)
-                        if skip_curves:
-                            continue
-
-                        # safe-get points; some versions provide 4 points
-                        pts = []
-                        for pi in item[1:]:
-                            if pi is None:
-                                continue
-                            # pi might be tuple(x,y)
-                            if isinstance(pi, (list, tuple)) and len(pi) >= 2:
-                                pts.append(self._simple_transform(
-                                    pi, page_height, offset_x, offset_y))
-                                if len(pts) >= 4:
-                                    break
-                        if len(pts) >= 2:
-                            qgs_pts = [QgsPointXY(p[0], p[1]) for p in pts]
-                            geom = QgsGeometry.fromPolylineXY(qgs_pts)
-                            feature.setGeometry(geom)
-                            feature.setAttribute("gtype", "curve")
-                            writer.addFeature(feature)
-                            feature_id += 1
-
-                    elif cmd == 're' or cmd.lower() == 're' or cmd == 'rect':
-                        # rectangle data may be in item[1] as a Rect objects or tuple
-                        rect = item[1]
-                        try:
-                            # rect might have attributes x0, y0, x1, y1
-                            x0, y0 = rect.x0, rect.y0
-                            x1, y1 = rect.x1, rect.y1
-                        except Exception:
-                            # maybe it's a tuple (x0, y0, x1, y1)
-                            try:
-                                x0, y0, x1, y1 = rect
-                            except Exception:
-                                continue
-                        pts = [(x0, y0), (x1, y0), (x1, y1),
-                               (x0, y1), (x0, y0)]
-                        qgs_points = [QgsPointXY(
-                            *self._simple_transform(p, page_height, offset_x, offset_y)) for p in pts]
-                        geom = QgsGeometry.fromPolylineXY(qgs_points)
-                        feature.setGeometry(geom)
-                        feature.setAttribute("gtype", "rectangle")
-                        writer.addFeature(feature)
-                        feature_id += 1
-
-                    else:
-                        # unhandled command; attempt to extract any point-like data and write as short polyline
-                        pts = []
-                        for part in item[1:]:
-                            if isinstance(part, (list, tuple)) and len(part) >= 2:
-                                pts.append(self._simple_transform(
-                                    part, page_height, offset_x, offset_y))
-                        if pts:
-                            qgs_pts = [QgsPointXY(p[0], p[1]) for p in pts]
-                            geom = QgsGeometry.fromPolylineXY(qgs_pts)
-                            feature.setGeometry(geom)
-                            feature.setAttribute("gtype", f"cmd_{cmd}")
-                            writer.addFeature(feature)
-                            feature_id += 1
-                except Exception as e:
-                    feedback.pushWarning(
-                        f"Skipping drawing item due to error: {e}")
-                    continue
+        pending = []
+        # Copies of a template share its field definitions (implicit sharing)
+        # instead of rebuilding them from fields for every item
+        template = QgsFeature(fields)
+        for gtype, start, end in shapes:
+            try:
+                feature = QgsFeature(template)
+                feature.setAttributes([feature_id, gtype])
+                line_x = xs[start:end]
+                line_y = ys[start:end]
+                if gtype == "rectangle":
+                    # close the ring by reusing the first corner
+                    line_x.append(line_x[0])
+                    line_y.append(line_y[0])
+                # straight from coordinate lists, no QgsPointXY per vertex
+                geom = QgsGeometry(QgsLineString(line_x, line_y))
+                feature.setGeometry(geom)
+                pending.append(feature)
+                feature_id += 1
+            except Exception as e:
+                feedback.pushWarning(
+                    f"Skipping drawing item due to error: {e}")
+                continue
+            if len(pending) >= WRITE_BATCH_SIZE:
+                writer = self._write_features(writer, pending, feedback, open_writer)
+        writer = self._write_features(writer, pending, feedback, open_writer)
 
         # finalize writer
         try:
@@ -680,6 +485,8 @@ class PdfToDxfAlgorithm(QgsProcessingAlgorithm):
         except Exception:
             pass
 
+        if not feature_id:
+            return 0
         feedback.pushInfo(f"Created geometry layer with {feature_id} features")
 
         # Report final extent
@@ -689,23 +496,21 @@ class PdfToDxfAlgorithm(QgsProcessingAlgorithm):
         final_y_max = offset_y + page_height
         feedback.pushInfo(
             f"Layer extent: ({final_x_min:.2f}, {final_y_min:.2f}) to ({final_x_max:.2f}, {final_y_max:.2f})")
+        return feature_id
 
-    def _create_text_layer(self, page, output_path, crs, driver, feedback, canvas_extent=None):
-        """Create a vector layer for PDF text"""
+    def _create_text_layer(self, page_data, output_path, crs, driver, feedback, canvas_extent=None):
+        """
+        Create a vector layer for PDF text.
+        Returns the number of features written; no file is created for 0.
+        """
         fields = QgsFields()
         fields.append(QgsField("id", QVariant.Int))
         fields.append(QgsField("txt", QVariant.String))
         fields.append(QgsField("fsize", QVariant.Double))
         fields.append(QgsField("fname", QVariant.String))
 
-        page_width = getattr(page, "rect", None).width if getattr(
-            page, "rect", None) else None
-        page_height = getattr(page, "rect", None).height if getattr(
-            page, "rect", None) else None
-
-        if page_width is None or page_height is None:
-            raise QgsProcessingException(
-                "Unable to determine page dimensions from PyMuPDF page object.")
+        page_width = page_data["width"]
+        page_height = page_data["height"]
 
         if canvas_extent and not canvas_extent.isEmpty():
             canvas_center_x = canvas_extent.center().x()
@@ -716,97 +521,99 @@ class PdfToDxfAlgorithm(QgsProcessingAlgorithm):
             offset_x = 0.0
             offset_y = 0.0
 
-        parent = os.path.dirname(output_path)
-        if parent and not os.path.exists(parent):
-            os.makedirs(parent, exist_ok=True)
+        writer = None
+        open_writer = partial(self._open_writer, output_path, fields,
+                              QgsWkbTypes.Point, crs, driver, "text")
 
-        try:
-            writer = QgsVectorFileWriter(
-                output_path,
-                "UTF-8",
-                fields,
-                QgsWkbTypes.Point,
-                crs,
-                driver
-            )
-        except TypeError:
+        text_count = 0
+        pending = []
+        # spans were filtered and given an origin by extract_page()
+        spans = page_data["spans"]
+        xs, ys = transform_points(
+            [span[3] for span in spans], page_height, offset_x, offset_y)
+        template = QgsFeature(fields)
+        for (text, size, font, origin), x, y in zip(spans, xs, ys):
             try:
-                writer = QgsVectorFileWriter(
-                    output_path, fields, QgsWkbTypes.Point, crs, driver)
+                feature = QgsFeature(template)
+                feature.setAttributes([text_count, text, float(size), font])
+                # the QgsPoint is handed to the geometry as is, where
+                # fromPointXY() would convert a QgsPointXY into a new one
+                feature.setGeometry(QgsGeometry(QgsPoint(x, y)))
+                pending.append(feature)
+                text_count += 1
             except Exception as e:
-                raise Exception(f"Error creating text layer writer: {e}")
-
-        try:
-            text_dict = page.get_text("dict") or {}
-        except Exception as e:
-            feedback.pushWarning(f"Could not extract text from page: {e}")
-            text_dict = {}
-
-        text_count = 0
-        for block in text_dict.get("blocks", []):
-            if block.get("type", None) != 0:
+                feedback.pushWarning(
+                    f"Skipping text span due to error: {e}")
                 continue
-            for line in block.get("lines", []):
-                for span in line.get("spans", []):
-                    text = span.get("text", "")
-                    if not text or not text.strip():
-                        continue
-                    size = span.get("size", 0.0)
-                    origin = span.get("origin", None)
-                    font = span.get("font", "Unknown")
-
-                    if not origin or len(origin) < 2:
-                        # sometimes origin not present; try bbox
-                        bbox = span.get("bbox", None)
-                        if bbox and len(bbox) >= 2:
-                            origin = (bbox[0], bbox[1])
-                        else:
-                            continue
-
-                    transformed_pt = self._simple_transform(
-                        origin, page_height, offset_x, offset_y)
-
-                    try:
-                        feature = QgsFeature(fields)
-                        feature.setAttribute("id", text_count)
-                        feature.setAttribute("txt", text)
-                        feature.setAttribute("fsize", float(size))
-                        feature.setAttribute("fname", font)
-                        geom = QgsGeometry.fromPointXY(QgsPointXY(
-                            transformed_pt[0], transformed_pt[1]))
-                        feature.setGeometry(geom)
-                        writer.addFeature(feature)
-                        text_count += 1
-                    except Exception as e:
-                        feedback.pushWarning(
-                            f"Skipping text span due to error: {e}")
-                        continue
+            if len(pending) >= WRITE_BATCH_SIZE:
+                writer = self._write_features(writer, pending, feedback, open_writer)
+        writer = self._write_features(writer, pending, feedback, open_writer)
 
         try:
             del writer
         except Exception:
             pass
 
-        feedback.pushInfo(f"Created text layer with {text_count} features")
+        if text_count:
+            feedback.pushInfo(f"Created text layer with {text_count} features")
+        return text_count
 
-    def _simple_transform(self, point, page_height, offset_x, offset_y):
-        """
-        Simple transformation: flip Y axis and add offset.
-        PDF: (0,0) at top-left, Y increases downward
-        Output: (0,0) at bottom-left, Y increases upward, then offset to canvas center
-        """
-        # point expected as (x, y)
+    def _open_writer(self, output_path, fields, wkb_type, crs, driver, kind):
+        """Create the QgsVectorFileWriter for a geometry or text layer."""
+        # Ensure parent dir exists
+        parent = os.path.dirname(output_path)
+        if parent and not os.path.exists(parent):
+            os.makedirs(parent, exist_ok=True)
+
+        create = getattr(QgsVectorFileWriter, "create", None)  # QGIS >= 3.10
+        if create is not None:
+            save_options = QgsVectorFileWriter.SaveVectorOptions()
+            save_options.driverName = driver
+            save_options.fileEncoding = "UTF-8"
+            writer = create(output_path, fields, wkb_type, crs,
+                            self.transform_context, save_options)
+        else:
+            try:
+                writer = QgsVectorFileWriter(
+                    output_path,
+                    "UTF-8",
+                    fields,
+                    wkb_type,
+                    crs,
+                    driver
+                )
+            except TypeError:
+                # In case of QGIS API differences, try alternate signature
+                try:
+                    writer = QgsVectorFileWriter(
+                        output_path, fields, wkb_type, crs, driver)
+                except Exception as e:
+                    raise Exception(f"Error creating {kind} layer writer: {e}")
+
+        # If writer reports error, raise
         try:
-            x = float(point[0])
-            y = float(point[1])
+            err = writer.hasError() if hasattr(writer, 'hasError') else None
+            if err is not None and err != QgsVectorFileWriter.NoError:
+                msg = writer.errorMessage() if hasattr(
+                    writer, 'errorMessage') else "Unknown writer error"
+                raise Exception(f"Error creating {kind} layer: {msg}")
         except Exception:
-            # fallback: if point is object with x,y
-            try:
-                x = float(point.x)
-                y = float(point.y)
-            except Exception:
-                x, y = 0.0, 0.0
-        new_y = page_height - y
-        final_x = x + offset_x
-        final_y = new_y + offset_y
-        return (final_x, final_y)
+            # proceed — some QGIS versions don't expose hasError in same way
+            pass
+        return writer
+
+    def _write_features(self, writer, pending, feedback, open_writer):
+        """
+        Hand a batch of features to the writer in one call and clear it.
+        The writer is created with open_writer() on the first non-empty
+        batch, so layers without features leave no file behind.
+        """
+        if not pending:
+            return writer
+        if writer is None:
+            writer = open_writer()
+        if not writer.addFeatures(pending):
+            feedback.pushWarning(
+                f"Failed to write {len(pending)} features: {writer.errorMessage()}")
+        pending.clear()
+        return writer
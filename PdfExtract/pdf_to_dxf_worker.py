@@ -0,0 +1,1160 @@
+# -*- coding: utf-8 -*-
+# Author: Surveyor Stories
+"""
+Per-page conversion workers.
+
+Nothing in this module imports qgis, so the workers can run in a separate
+Python process. Results only contain plain tuples/dicts so they pickle
+cheaply back to the QGIS process, which does the layer writing.
+"""
+import os
+import multiprocessing
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache, partial
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Below this many points the numpy round trip costs more than it saves
+NUMPY_MIN_POINTS = 64
+
+# Shared by every geometry entity; ezdxf copies the attributes it is given
+GEOMETRY_ATTRS = {'layer': 'PDF_GEOMETRY'}
+# Per-span text attributes start from a copy of these
+TEXT_ATTRS = {'layer': 'PDF_TEXT'}
+MTEXT_ATTRS = {'layer': 'PDF_TEXT', 'attachment_point': 7}  # BottomLeft
+
+# DXF layer -> ACI color
+LAYER_COLORS = {'PDF_GEOMETRY': 7, 'PDF_TEXT': 1}
+
+# Largest distance, in PDF points, of a flattened Bezier from the curve
+CURVE_TOLERANCE = 0.25
+
+# Segments a flattened Bezier gets at least, the default of both front ends
+MIN_CURVE_SEGMENTS = 4
+
+# Write buffer of DXF output files, see _dxf_output()
+OUTPUT_BUFFER_SIZE = 256 * 1024
+
+# Most pool processes map_pages() starts. Each one imports PyMuPDF and
+# ezdxf and opens its own copy of the PDF, which past this many costs more
+# in startup and memory than the extra cores give back
+MAX_POOL_WORKERS = 6
+
+# Fewer pages than this are converted in the calling process. A pool
+# process takes a few hundred milliseconds to start and import its modules,
+# more than a handful of ordinary pages cost to convert
+POOL_MIN_PAGES = 4
+
+# Runs of pages queued per pool process at a time. Finished runs wait for
+# the caller to write them, so this bounds how many pages' results are
+# held in memory when writing falls behind
+RUNS_IN_FLIGHT = 2
+
+# Seconds between checks for a cancel while waiting on a pool run
+CANCEL_POLL_INTERVAL = 0.1
+
+
+def convert_pdf_page_to_dxf_direct(page, output_dxf_path, min_size=0.0, skip_curves=False, ascii_dxf=True, bezier_segments=0, crop_rect=None, streamed=False, geometry=True, text=True):
+    """
+    Convert PDF page directly to DXF using ezdxf (better quality).
+    With crop_rect (x0, y0, x1, y1 in PDF coordinates) only the part of
+    the page inside it is converted, see _crop_item().
+    ASCII DXF is written unless ascii_dxf is False; binary DXF is smaller
+    and quicker to serialize, but older GDAL and many CAD tools cannot read
+    it. With bezier_segments > 0, cubic Beziers are written as LWPOLYLINEs
+    of at least that many segments instead of SPLINEs, see flatten_cubic().
+    With streamed set, entities are written straight to the file as DXF
+    R12 instead of being built up as an ezdxf document first, see
+    _R12Space. geometry and text select what is read from the page, as
+    for extract_page().
+    """
+    try:
+        import ezdxf
+    except ImportError:
+        return False, "ezdxf not installed"
+
+    try:
+        if streamed:
+            from ezdxf.addons import r12writer
+            with _dxf_output(output_dxf_path, ascii_dxf, 'cp1252', 'dxfreplace') as stream, \
+                    r12writer(stream, fmt='asc' if ascii_dxf else 'bin') as writer:
+                _write_page_entities(_R12Space(writer, bezier_segments or 4), page,
+                                     min_size, skip_curves, bezier_segments, crop_rect,
+                                     geometry, text)
+            return True, None
+
+        dxf = ezdxf.new()
+        # Create layers
+        for name, color in LAYER_COLORS.items():
+            dxf.layers.new(name=name, dxfattribs={'color': color})
+
+        _write_page_entities(dxf.modelspace(), page, min_size, skip_curves,
+                             bezier_segments, crop_rect, geometry, text)
+        # as Drawing.saveas(), but through a large buffer and a temp file
+        with _dxf_output(output_dxf_path, ascii_dxf, dxf.output_encoding, 'dxfreplace') as stream:
+            dxf.write(stream, fmt='asc' if ascii_dxf else 'bin')
+        return True, None
+
+    except Exception as e:
+        return False, str(e)
+
+
+@contextmanager
+def _dxf_output(path, ascii_dxf, encoding, errors):
+    """
+    Open a buffered stream for a DXF file: text with encoding and errors
+    for ASCII DXF, binary otherwise. It writes to a temp file next to
+    path, which only replaces path once writing succeeded, so a failed
+    page never leaves a truncated DXF behind.
+    """
+    tmp_path = path + '.part'
+    if ascii_dxf:
+        stream = open(tmp_path, 'wt', encoding=encoding, errors=errors,
+                      buffering=OUTPUT_BUFFER_SIZE)
+    else:
+        stream = open(tmp_path, 'wb', buffering=OUTPUT_BUFFER_SIZE)
+    try:
+        with stream:
+            yield stream
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _write_page_entities(msp, page, min_size, skip_curves, bezier_segments, crop_rect,
+                         geometry=True, text=True):
+    """Add the drawings and text of page to msp, see convert_pdf_page_to_dxf_direct()."""
+    page_height = page.rect.height
+    crop_rect = _page_crop(page, crop_rect)
+
+    # 1. Extract Drawings
+    paths = _page_drawings(page) if geometry else []
+    writers = DXF_WRITERS
+    if bezier_segments > 0:
+        writers = dict(DXF_WRITERS, curve=partial(
+            _add_bezier, segments=bezier_segments))
+
+    # Points of all shapes and text origins go into one list so the
+    # y flip runs once over the whole page, see transform_points()
+    coords = []
+    shapes = []  # (writer, start, end) into coords
+    # loop-invariant lookups bound to locals once per page
+    get_writer = writers.get
+    add_shape = shapes.append
+    extend_coords = coords.extend
+    points = item_points_func(min_size, skip_curves)
+    # points() returns None for malformed items, no try per item
+    for item in _merged_items(paths, crop_rect, min_size):
+        shape = points(item)
+        if shape is None:
+            continue
+        gtype, pts = shape
+        add = get_writer(gtype)
+        if add is not None:
+            start = len(coords)
+            add_shape((add, start, start + len(pts)))
+            extend_coords(pts)
+
+    # 2. Extract Text
+    try:
+        text_dict = _text_dict(page, crop_rect) if text else {}
+    except Exception:
+        text_dict = {}
+
+    spans = []  # (text, size, index of the origin in coords)
+    add_span = spans.append
+    add_origin = coords.append
+    for block in text_dict.get("blocks", ()):
+        for line in block.get("lines", ()):
+            for span in line.get("spans", ()):
+                # MuPDF always fills these keys; index them directly
+                try:
+                    text = span["text"].strip()
+                    ox, oy = span["origin"]
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if not text:
+                    continue
+                add_span((text, span.get("size", 10), len(coords)))
+                add_origin((ox, oy))
+
+    xs, ys = transform_points(coords, page_height, 0.0, 0.0)
+
+    geometry_attrs = GEOMETRY_ATTRS
+    for add, start, end in shapes:
+        try:
+            add(msp, list(zip(xs[start:end], ys[start:end])), geometry_attrs)
+        except Exception:
+            continue
+
+    add_text = _add_span_text
+    for text, size, i in spans:
+        try:
+            add_text(msp, text, size, (xs[i], ys[i]))
+        except Exception:
+            continue
+
+
+class _R12Space:
+    """
+    The part of the ezdxf modelspace API the DXF writers use, on top of an
+    r12writer stream. R12 has no LWPOLYLINE, SPLINE or MTEXT, so these
+    become 2D POLYLINEs, flattened Beziers and TEXT lines. Layers are not
+    declared in a streamed file, so entities carry their layer's color.
+    """
+
+    def __init__(self, writer, curve_segments=4):
+        self.writer = writer
+        self.curve_segments = curve_segments
+
+    def add_line(self, start, end, dxfattribs):
+        layer = dxfattribs['layer']
+        self.writer.add_line(start, end, layer=layer, color=LAYER_COLORS.get(layer))
+
+    def add_lwpolyline(self, points, close=False, dxfattribs=None):
+        layer = dxfattribs['layer']
+        self.writer.add_polyline_2d(points, closed=close, layer=layer,
+                                    color=LAYER_COLORS.get(layer))
+
+    def add_spline(self, points, degree=3, dxfattribs=None):
+        if len(points) == 4:
+            points = flatten_cubic(*points, min_segments=self.curve_segments)
+        self.add_lwpolyline(points, dxfattribs=dxfattribs)
+
+    def add_text(self, text, dxfattribs):
+        layer = dxfattribs['layer']
+        self.writer.add_text(text, insert=dxfattribs['insert'],
+                             height=dxfattribs['height'], layer=layer,
+                             color=LAYER_COLORS.get(layer))
+
+    def add_mtext(self, text, dxfattribs):
+        # one TEXT per line, stacked downwards from the bottom-left insert
+        x, y = dxfattribs['insert'][:2]
+        height = dxfattribs['char_height']
+        lines = text.split('\n')
+        for n, line in enumerate(lines):
+            self.add_text(line, {'layer': dxfattribs['layer'], 'height': height,
+                                 'insert': (x, y + (len(lines) - 1 - n) * height * 1.5)})
+
+
+def _add_span_text(msp, text, size, insert_point):
+    # A span is a single line; TEXT is a plain entity while MTEXT carries a
+    # formatting language and more group codes. The default TEXT alignment
+    # puts insert on the baseline, which is where the span origin lies.
+    if '\n' in text:
+        attribs = MTEXT_ATTRS.copy()
+        attribs['char_height'] = size
+        attribs['insert'] = insert_point
+        msp.add_mtext(text, dxfattribs=attribs)
+    else:
+        attribs = TEXT_ATTRS.copy()
+        attribs['height'] = size
+        attribs['insert'] = insert_point
+        msp.add_text(text, dxfattribs=attribs)
+
+
+def _line_points(item):
+    # two points, or more for segments joined by _merged_items()
+    if len(item) < 3:
+        return None
+    return "line", list(item[1:])
+
+
+def _curve_points(item):
+    # safe-get points; some versions provide 4 points
+    pts = [pt for pt in item[1:]
+           if isinstance(pt, (list, tuple)) and len(pt) >= 2][:4]
+    return ("curve", pts) if len(pts) >= 2 else None
+
+
+def _rect_points(item):
+    rect = item[1] if len(item) > 1 else None
+    if rect is None or len(rect) != 4:
+        return None
+    x0, y0, x1, y1 = rect
+    # the four corners only; consumers close the ring themselves
+    return "rectangle", [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+
+
+def _other_points(item):
+    # unhandled command; keep any point-like data as a short polyline
+    pts = [(part[0], part[1]) for part in item[1:]
+           if isinstance(part, (list, tuple)) and len(part) >= 2]
+    return (f"cmd_{item[0]}", pts) if pts else None
+
+
+# Drawing command -> function returning (gtype, points) for a plain item
+ITEM_POINTS = {
+    'l': _line_points,
+    'c': _curve_points,
+    're': _rect_points,
+    'rect': _rect_points,
+}
+
+
+def _extent(pts):
+    """Larger side of the bounding box of pts, in a single pass."""
+    xmin = xmax = pts[0][0]
+    ymin = ymax = pts[0][1]
+    for pt in pts:
+        x, y = pt[0], pt[1]
+        if x < xmin:
+            xmin = x
+        elif x > xmax:
+            xmax = x
+        if y < ymin:
+            ymin = y
+        elif y > ymax:
+            ymax = y
+    return max(xmax - xmin, ymax - ymin)
+
+
+def _skipped(item):
+    return None
+
+
+def item_points_func(min_size=0.0, skip_curves=False):
+    """
+    A function returning (gtype, points) for a plain drawing item, with
+    points as (x, y) pairs still in PDF page coordinates, or None if the
+    item is skipped or has no usable geometry. Curves are skipped with
+    skip_curves, and items whose extent is below min_size.
+    Both filters are settled here, once: the function tests only those
+    that are on, and skipped curves are dropped by the command lookup.
+    """
+    table = ITEM_POINTS
+    if skip_curves:
+        table = dict(ITEM_POINTS, c=_skipped)
+    get = table.get
+    if min_size <= 0:
+        def points(item):
+            return get(item[0], _other_points)(item)
+        return points
+
+    def sized_points(item):
+        shape = get(item[0], _other_points)(item)
+        if shape is not None and _extent(shape[1]) < min_size:
+            return None
+        return shape
+    return sized_points
+
+
+def _add_line(msp, pts, dxfattribs):
+    if len(pts) == 2:
+        msp.add_line(pts[0], pts[1], dxfattribs=dxfattribs)
+    elif _same_point(pts[0], pts[-1]):
+        # chain that ends where it started; let the closed flag repeat it
+        msp.add_lwpolyline(pts[:-1], close=True, dxfattribs=dxfattribs)
+    else:
+        msp.add_lwpolyline(pts, dxfattribs=dxfattribs)
+
+
+def _add_spline(msp, pts, dxfattribs):
+    msp.add_spline(pts, degree=3, dxfattribs=dxfattribs)
+
+
+def _add_rectangle(msp, pts, dxfattribs):
+    msp.add_lwpolyline(pts, close=True, dxfattribs=dxfattribs)
+
+
+def flatten_cubic(p0, p1, p2, p3, tol=CURVE_TOLERANCE, min_segments=MIN_CURVE_SEGMENTS):
+    """
+    Approximate a cubic Bezier by a polyline from p0 to p3 that stays
+    within tol of the curve. Segments are split adaptively, so flat curves
+    keep close to min_segments and tight ones get more. The minimum
+    matters: an S-curve's midpoint lies on its chord.
+    """
+    from ezdxf.math import Bezier4P
+    return [(v.x, v.y) for v in Bezier4P((p0, p1, p2, p3)).flattening(tol, min_segments)]
+
+
+def _add_bezier(msp, pts, dxfattribs, segments=MIN_CURVE_SEGMENTS):
+    # SPLINE entities carry knot vectors; a flattened cubic is much smaller
+    if len(pts) != 4:
+        _add_spline(msp, pts, dxfattribs)
+        return
+    msp.add_lwpolyline(flatten_cubic(*pts, min_segments=segments),
+                       dxfattribs=dxfattribs)
+
+
+# gtype -> ezdxf entity; other commands are not written to DXF
+DXF_WRITERS = {
+    "line": _add_line,
+    "curve": _add_spline,
+    "rectangle": _add_rectangle,
+}
+
+
+def clip_line_to_rect(x1, y1, x2, y2, rect):
+    """
+    Clip a line segment to a rectangle using Cohen-Sutherland algorithm.
+    rect is (x0, y0, x1, y1); a fitz.Rect works as well.
+    Returns (clipped_x1, clipped_y1, clipped_x2, clipped_y2) or None if line is completely outside.
+    """
+    x_min, y_min, x_max, y_max = rect
+
+    # Define region codes
+    INSIDE = 0  # 0000
+    LEFT = 1    # 0001
+    RIGHT = 2   # 0010
+    BOTTOM = 4  # 0100
+    TOP = 8     # 1000
+
+    def compute_code(x, y):
+        code = INSIDE
+        if x < x_min:
+            code |= LEFT
+        elif x > x_max:
+            code |= RIGHT
+        if y < y_min:
+            code |= BOTTOM
+        elif y > y_max:
+            code |= TOP
+        return code
+
+    code1 = compute_code(x1, y1)
+    code2 = compute_code(x2, y2)
+
+    while True:
+        # Both endpoints inside - accept
+        if code1 == 0 and code2 == 0:
+            return (x1, y1, x2, y2)
+
+        # Both endpoints share an outside region - reject
+        if code1 & code2:
+            return None
+
+        # Line needs clipping
+        # Pick an endpoint that is outside
+        code_out = code1 if code1 != 0 else code2
+
+        # Find intersection point
+        if code_out & TOP:
+            x = x1 + (x2 - x1) * (y_max - y1) / (y2 - y1)
+            y = y_max
+        elif code_out & BOTTOM:
+            x = x1 + (x2 - x1) * (y_min - y1) / (y2 - y1)
+            y = y_min
+        elif code_out & RIGHT:
+            y = y1 + (y2 - y1) * (x_max - x1) / (x2 - x1)
+            x = x_max
+        elif code_out & LEFT:
+            y = y1 + (y2 - y1) * (x_min - x1) / (x2 - x1)
+            x = x_min
+
+        # Replace the outside point with the intersection
+        if code_out == code1:
+            x1, y1 = x, y
+            code1 = compute_code(x1, y1)
+        else:
+            x2, y2 = x, y
+            code2 = compute_code(x2, y2)
+
+
+def clip_segments_to_rect(segments, rect):
+    """
+    clip_line_to_rect() for many segments at once. segments is a list of
+    (x1, y1, x2, y2) rows. Returns a list of keep flags and the list of
+    clipped rows; the values of rows that are not kept are unspecified.
+    Large batches run compiled with numba, see compiled_clip_segments(),
+    or else as one Liang-Barsky pass over numpy arrays.
+    """
+    if np is None or len(segments) < NUMPY_MIN_POINTS:
+        keep = []
+        rows = []
+        for x1, y1, x2, y2 in segments:
+            clipped = clip_line_to_rect(x1, y1, x2, y2, rect)
+            keep.append(clipped is not None)
+            rows.append(clipped or (x1, y1, x2, y2))
+        return keep, rows
+
+    x_min, y_min, x_max, y_max = rect
+    seg = np.array(segments, dtype=np.float64).reshape(-1, 4)
+    kernel = compiled_clip_segments()
+    if kernel is not None:
+        keep = kernel(seg, float(x_min), float(y_min), float(x_max), float(y_max))
+        return keep.tolist(), seg.tolist()
+
+    # Liang-Barsky: a single pass over all segments. Each edge k bounds
+    # the line parameter t by q[k] / p[k], from below where p[k] < 0
+    # (entering) and from above where p[k] > 0 (leaving).
+    x1, y1, x2, y2 = seg.T
+    dx = x2 - x1
+    dy = y2 - y1
+    p = np.stack([-dx, dx, -dy, dy])
+    q = np.stack([x1 - x_min, x_max - x1, y1 - y_min, y_max - y1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = q / p
+    t0 = np.where(p < 0, r, 0.0).max(axis=0)
+    t1 = np.where(p > 0, r, 1.0).min(axis=0)
+    # parallel to an edge and outside it
+    parallel_out = ((p == 0) & (q < 0)).any(axis=0)
+    keep = ~parallel_out & (t0 <= t1)
+    # unclipped ends keep their exact coordinates
+    out = np.column_stack([
+        np.where(t0 > 0, x1 + t0 * dx, x1), np.where(t0 > 0, y1 + t0 * dy, y1),
+        np.where(t1 < 1, x1 + t1 * dx, x2), np.where(t1 < 1, y1 + t1 * dy, y2)])
+    return keep.tolist(), out.tolist()
+
+
+def curves_inside_rect(curves, rect):
+    """
+    For each ('c', p1, p2, p3, p4) item in curves, whether all four
+    control points lie within rect. Many curves are tested at once on the
+    min/max of their control points.
+    """
+    x_min, y_min, x_max, y_max = rect
+    if np is None or len(curves) * 4 < NUMPY_MIN_POINTS:
+        return [all(x_min <= pt[0] <= x_max and y_min <= pt[1] <= y_max
+                    for pt in curve[1:]) for curve in curves]
+    pts = np.array([curve[1:] for curve in curves], dtype=np.float64).reshape(-1, 4, 2)
+    mn = pts.min(axis=1)
+    mx = pts.max(axis=1)
+    return ((mn[:, 0] >= x_min) & (mx[:, 0] <= x_max) &
+            (mn[:, 1] >= y_min) & (mx[:, 1] <= y_max)).tolist()
+
+
+def _inside(pt, crop_rect):
+    return (crop_rect[0] <= pt[0] <= crop_rect[2] and
+            crop_rect[1] <= pt[1] <= crop_rect[3])
+
+
+def _crop_item(item, crop_rect):
+    """
+    Fit a plain item to crop_rect, or return None if nothing of it is kept.
+    Lines are clipped to the region, rectangles must lie fully within it
+    and curves and other items must have all their points inside it.
+    """
+    cmd = item[0]
+    if cmd == 'l' and len(item) == 3:
+        clipped = clip_line_to_rect(
+            item[1][0], item[1][1], item[2][0], item[2][1], crop_rect)
+        if clipped is None:
+            return None
+        return (item[0], clipped[:2], clipped[2:])
+    if cmd in ('re', 'rect'):
+        try:
+            x0, y0, x1, y1 = item[1]
+        except (TypeError, ValueError):
+            return None
+        if _inside((x0, y0), crop_rect) and _inside((x1, y1), crop_rect):
+            return item
+        return None
+    pts = [part for part in item[1:]
+           if isinstance(part, (list, tuple)) and len(part) >= 2]
+    return item if all(_inside(pt, crop_rect) for pt in pts) else None
+
+
+def _page_crop(page, crop_rect):
+    """crop_rect, or None if it covers the whole page and crops nothing."""
+    if crop_rect is None:
+        return None
+    x0, y0, x1, y1 = crop_rect
+    r = page.rect
+    if x0 <= r.x0 and y0 <= r.y0 and x1 >= r.x1 and y1 >= r.y1:
+        return None
+    return crop_rect
+
+
+def _intersects(rect, crop_rect):
+    return (rect[0] <= crop_rect[2] and rect[2] >= crop_rect[0] and
+            rect[1] <= crop_rect[3] and rect[3] >= crop_rect[1])
+
+
+def _contains(crop_rect, rect):
+    return (rect[0] >= crop_rect[0] and rect[2] <= crop_rect[2] and
+            rect[1] >= crop_rect[1] and rect[3] <= crop_rect[3])
+
+
+def _paths_in_rect(paths, crop_rect):
+    """
+    Return (path, inside) for the paths whose bounding box intersects
+    crop_rect, plus those without one. inside tells that the box lies
+    wholly within crop_rect, so none of the path's items need fitting.
+    Many paths are tested in one numpy pass over their boxes.
+    """
+    if np is None or len(paths) < NUMPY_MIN_POINTS:
+        kept = []
+        for path in paths:
+            rect = path.get("rect")
+            if not rect:
+                kept.append((path, False))
+            elif _intersects(rect, crop_rect):
+                kept.append((path, _contains(crop_rect, rect)))
+        return kept
+    nan = float('nan')
+    boxes = np.array([tuple(path.get("rect") or (nan, nan, nan, nan))
+                      for path in paths], dtype=np.float64).reshape(-1, 4)
+    x0, y0, x1, y1 = boxes.T
+    cx0, cy0, cx1, cy1 = crop_rect
+    accepted = ((x0 <= cx1) & (x1 >= cx0) & (y0 <= cy1) & (y1 >= cy0) |
+                np.isnan(x0))
+    # NaN compares False, so paths without a box are never inside
+    inside = (x0 >= cx0) & (x1 <= cx1) & (y0 >= cy0) & (y1 <= cy1)
+    return [(paths[i], bool(inside[i])) for i in np.flatnonzero(accepted)]
+
+
+def _same_point(a, b, eps=1e-6):
+    return abs(a[0] - b[0]) <= eps and abs(a[1] - b[1]) <= eps
+
+
+def _segment_key(a, b):
+    a = (round(a[0], 6), round(a[1], 6))
+    b = (round(b[0], 6), round(b[1], 6))
+    return (a, b) if a <= b else (b, a)
+
+
+def _cropped_path_items(paths, crop_rect):
+    """
+    Yield the plain items of each path that intersects crop_rect, fitted
+    to it with _crop_item(). The line segments of all paths are clipped in
+    a single clip_segments_to_rect() batch, and the curves are tested in
+    one curves_inside_rect() batch. Paths lying wholly inside crop_rect
+    are passed through without either.
+    """
+    kept = []  # plain items per path; dropped lines and curves become None
+    lines = []  # (items list, index) of every line segment
+    curves = []  # (items list, index) of every cubic Bezier
+    for path, inside in _paths_in_rect(paths, crop_rect):
+        if inside:
+            kept.append([_plain_item(item) for item in path.get("items", []) if item])
+            continue
+        items = []
+        for item in path.get("items", []):
+            if not item:
+                continue
+            item = _plain_item(item)
+            if item[0] == 'l' and len(item) == 3:
+                lines.append((items, len(items)))
+                items.append(item)
+                continue
+            if item[0] == 'c' and len(item) == 5:
+                curves.append((items, len(items)))
+                items.append(item)
+                continue
+            item = _crop_item(item, crop_rect)
+            if item is not None:
+                items.append(item)
+        kept.append(items)
+
+    if lines:
+        keep, rows = clip_segments_to_rect(
+            [(items[i][1][0], items[i][1][1], items[i][2][0], items[i][2][1])
+             for items, i in lines], crop_rect)
+        for (items, i), ok, row in zip(lines, keep, rows):
+            items[i] = ('l', (row[0], row[1]), (row[2], row[3])) if ok else None
+
+    if curves:
+        inside = curves_inside_rect([items[i] for items, i in curves], crop_rect)
+        for (items, i), ok in zip(curves, inside):
+            if not ok:
+                items[i] = None
+
+    for items in kept:
+        yield [item for item in items if item is not None]
+
+
+def _merged_items(paths, crop_rect=None, min_size=0.0):
+    """
+    Yield the plain items of every path. Consecutive line segments of a
+    path that continue from each other's end point are joined into one
+    multi-point 'l' item, so a long polyline becomes one feature instead
+    of one per segment.
+    With crop_rect, paths outside it are skipped and the items are fitted
+    to it by _cropped_path_items() before the segments are joined.
+    Zero-length segments and segments repeated within the same path (in
+    either direction) are dropped; CAD exports often contain thousands of
+    them. Repeats across paths are kept, they may carry a different style.
+    Segments whose bounding box is smaller than min_size on both sides are
+    dropped before joining too, so min_size keeps its per-segment meaning
+    and a run of tiny segments does not survive as one long chain.
+    """
+    if crop_rect:
+        path_items = _cropped_path_items(paths, crop_rect)
+    else:
+        path_items = ([_plain_item(item) for item in path.get("items", []) if item]
+                      for path in paths)
+    for items in path_items:
+        seen = set()  # rounded end points of the segments kept in this path
+        run = None  # points of the current chain of 'l' segments
+        for item in items:
+            if item[0] == 'l' and len(item) >= 3:
+                if _same_point(item[1], item[2]):
+                    continue
+                if min_size > 0 and _extent(item[1:3]) < min_size:
+                    continue
+                key = _segment_key(item[1], item[2])
+                if key in seen:
+                    continue
+                seen.add(key)
+                if run and _same_point(run[-1], item[1]):
+                    run.append(item[2])
+                    continue
+                if run:
+                    yield ('l',) + tuple(run)
+                run = [item[1], item[2]]
+                continue
+            if run:
+                yield ('l',) + tuple(run)
+                run = None
+            yield item
+        if run:
+            yield ('l',) + tuple(run)
+
+
+def _text_dict(page, clip=None):
+    """
+    page.get_text("dict", clip=clip) without image blocks. Only text blocks
+    are used, and leaving out TEXT_PRESERVE_IMAGES stops MuPDF from decoding
+    every embedded image into the result, so every block is a text block.
+    Spans are read in content order; no sorting is needed since only their
+    origins are used.
+    """
+    import fitz
+    flags = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+    return page.get_textpage(clip=clip, flags=flags).extractDICT(sort=False) or {}
+
+
+def transform_points(coords, page_height, offset_x, offset_y):
+    """
+    Simple transformation: flip Y axis and add offset.
+    PDF: (0,0) at top-left, Y increases downward
+    Output: (0,0) at bottom-left, Y increases upward, then offset to canvas center
+
+    coords is a list of (x, y) float tuples, transformed all at once;
+    returns separate lists of x and y values.
+    Uses numpy when available and the list is large enough to pay
+    for the array conversion.
+    """
+    if np is None or len(coords) < NUMPY_MIN_POINTS:
+        # inline arithmetic on locals, no call per point
+        return ([x + offset_x for x, _ in coords],
+                [page_height - y + offset_y for _, y in coords])
+    pts = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    return ((pts[:, 0] + offset_x).tolist(),
+            (page_height - pts[:, 1] + offset_y).tolist())
+
+
+def _filter_and_transform(coords, starts, ends, page_height, offset_x, offset_y, min_size):
+    """
+    Size-filter and transform the shapes stored as starts[i]:ends[i] slices
+    of the (N, 2) coords array. Returns the keep mask and the transformed
+    coordinates. Only used compiled, see compiled_filter_and_transform().
+    """
+    keep = np.ones(starts.shape[0], dtype=np.bool_)
+    out = np.empty_like(coords)
+    for i in range(starts.shape[0]):
+        xmin = xmax = coords[starts[i], 0]
+        ymin = ymax = coords[starts[i], 1]
+        for j in range(starts[i], ends[i]):
+            x = coords[j, 0]
+            y = coords[j, 1]
+            xmin = min(xmin, x)
+            xmax = max(xmax, x)
+            ymin = min(ymin, y)
+            ymax = max(ymax, y)
+            out[j, 0] = x + offset_x
+            out[j, 1] = page_height - y + offset_y
+        if min_size > 0 and max(xmax - xmin, ymax - ymin) < min_size:
+            keep[i] = False
+    return keep, out
+
+
+@lru_cache(maxsize=None)
+def compiled_filter_and_transform():
+    """
+    _filter_and_transform() compiled with numba, or None without numba.
+    numba is imported here on first use rather than with the module, as it
+    takes a while to load.
+    """
+    if np is None:
+        return None
+    try:
+        import numba
+    except ImportError:
+        return None
+    return numba.njit(cache=True)(_filter_and_transform)
+
+
+def _clip_segments(seg, x_min, y_min, x_max, y_max):
+    """
+    Clip the rows (x1, y1, x2, y2) of the (N, 4) seg array to the rect in
+    place, as clip_line_to_rect() does. Returns the keep mask. Only used
+    compiled, see compiled_clip_segments().
+    """
+    keep = np.zeros(seg.shape[0], dtype=np.bool_)
+    for i in range(seg.shape[0]):
+        x1 = seg[i, 0]
+        y1 = seg[i, 1]
+        x2 = seg[i, 2]
+        y2 = seg[i, 3]
+        # LEFT = 1, RIGHT = 2, BOTTOM = 4, TOP = 8, as in clip_line_to_rect()
+        code1 = ((x1 < x_min) * 1 | (x1 > x_max) * 2 |
+                 (y1 < y_min) * 4 | (y1 > y_max) * 8)
+        code2 = ((x2 < x_min) * 1 | (x2 > x_max) * 2 |
+                 (y2 < y_min) * 4 | (y2 > y_max) * 8)
+        # every end point is clipped at most twice (once per axis)
+        for _ in range(4):
+            if code1 == 0 and code2 == 0 or code1 & code2:
+                break
+            code_out = code1 if code1 != 0 else code2
+            if code_out & 8:
+                x = x1 + (x2 - x1) * (y_max - y1) / (y2 - y1)
+                y = y_max
+            elif code_out & 4:
+                x = x1 + (x2 - x1) * (y_min - y1) / (y2 - y1)
+                y = y_min
+            elif code_out & 2:
+                y = y1 + (y2 - y1) * (x_max - x1) / (x2 - x1)
+                x = x_max
+            else:
+                y = y1 + (y2 - y1) * (x_min - x1) / (x2 - x1)
+                x = x_min
+            code = ((x < x_min) * 1 | (x > x_max) * 2 |
+                    (y < y_min) * 4 | (y > y_max) * 8)
+            if code_out == code1:
+                x1 = x
+                y1 = y
+                code1 = code
+            else:
+                x2 = x
+                y2 = y
+                code2 = code
+        seg[i, 0] = x1
+        seg[i, 1] = y1
+        seg[i, 2] = x2
+        seg[i, 3] = y2
+        keep[i] = code1 == 0 and code2 == 0
+    return keep
+
+
+@lru_cache(maxsize=None)
+def compiled_clip_segments():
+    """_clip_segments() compiled with numba, or None without numba."""
+    if np is None:
+        return None
+    try:
+        import numba
+    except ImportError:
+        return None
+    return numba.njit(cache=True)(_clip_segments)
+
+
+def _numpy_size_mask(coords, shapes, min_size):
+    """
+    Which shapes reach min_size, from per-shape bounding boxes computed
+    with np.*.reduceat. Needs the shapes to be the back-to-back, non-empty
+    slices the writers build; returns None when numpy is missing, coords is
+    too short to pay for the arrays, or the shapes are laid out otherwise.
+    """
+    if np is None or len(coords) < NUMPY_MIN_POINTS:
+        return None
+    starts = np.array([shape[1] for shape in shapes], dtype=np.int64)
+    ends = np.array([shape[2] for shape in shapes], dtype=np.int64)
+    if starts[0] != 0 or ends[-1] != len(coords) or \
+            not np.array_equal(starts[1:], ends[:-1]) or np.any(ends <= starts):
+        return None
+    pts = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    width = np.maximum.reduceat(pts[:, 0], starts) - np.minimum.reduceat(pts[:, 0], starts)
+    height = np.maximum.reduceat(pts[:, 1], starts) - np.minimum.reduceat(pts[:, 1], starts)
+    return np.maximum(width, height) >= min_size
+
+
+def place_shapes(coords, shapes, page_height, offset_x, offset_y, min_size=0.0):
+    """
+    Drop the shapes whose extent is below min_size and move coords to the
+    output space. shapes are (gtype, start, end) slices of the (x, y) list
+    coords. Returns the kept shapes and the transformed x and y lists.
+    """
+    kernel = compiled_filter_and_transform()
+    if kernel is None or not shapes:
+        if min_size > 0 and shapes:
+            keep = _numpy_size_mask(coords, shapes, min_size)
+            if keep is not None:
+                shapes = [shape for shape, kept in zip(shapes, keep) if kept]
+            else:
+                shapes = [shape for shape in shapes
+                          if _extent(coords[shape[1]:shape[2]]) >= min_size]
+        xs, ys = transform_points(coords, page_height, offset_x, offset_y)
+        return shapes, xs, ys
+    keep, out = kernel(
+        np.asarray(coords, dtype=np.float64).reshape(-1, 2),
+        np.array([shape[1] for shape in shapes], dtype=np.int64),
+        np.array([shape[2] for shape in shapes], dtype=np.int64),
+        page_height, offset_x, offset_y, min_size)
+    shapes = [shape for shape, kept in zip(shapes, keep) if kept]
+    return shapes, out[:, 0].tolist(), out[:, 1].tolist()
+
+
+# Known drawing commands in any spelling (str or bytes, either case), mapped
+# to the lower-case str form the rest of this module compares against
+COMMANDS = {spelling: cmd for cmd in ('l', 'c', 're', 'rect', 'qu')
+            for spelling in (cmd, cmd.upper(), cmd.encode(), cmd.upper().encode())}
+
+
+def _as_tuple(part):
+    """part with any Point, Rect or Quad in it turned into plain tuples."""
+    if isinstance(part, (str, bytes, int, float)):
+        return part
+    return tuple(_as_tuple(p) for p in part)
+
+
+def _page_drawings(page):
+    """
+    The drawings of page. get_cdrawings() (PyMuPDF 1.22+) yields plain
+    tuples instead of Point/Rect objects; older versions fall back to
+    get_drawings(), whose items and boxes are converted to the same
+    tuples, since the item filters only take tuple points.
+    """
+    get_cdrawings = getattr(page, "get_cdrawings", None)
+    if get_cdrawings is None:
+        paths = page.get_drawings()
+        for path in paths:
+            if path.get("rect") is not None:
+                path["rect"] = _as_tuple(path["rect"])
+            path["items"] = [_as_tuple(item) for item in path.get("items", [])]
+        return paths
+    return get_cdrawings()
+
+
+def _plain_item(item):
+    """Normalize a get_cdrawings() item, whose points are already tuples."""
+    # a single lookup for the usual commands; no decode or lower() per item
+    cmd = COMMANDS.get(item[0])
+    if cmd is None:
+        cmd = item[0]
+        if isinstance(cmd, bytes):
+            cmd = cmd.decode('utf-8', errors='ignore')
+        cmd = cmd.lower()
+    if cmd != item[0]:
+        item = (cmd,) + tuple(item[1:])
+    if cmd == 'qu':
+        # Quad (ul, ur, ll, lr) -> closed outline through its corners
+        ul, ur, ll, lr = item[1]
+        return (cmd, ul, ur, lr, ll, ul)
+    return item
+
+
+def extract_page(page, crop_rect=None, geometry=True, text=True, min_size=0.0):
+    """
+    Pull the drawing items and text spans the vector layers need out of a
+    PyMuPDF page, limited to crop_rect if one is given. Line segments
+    smaller than min_size are dropped, see _merged_items().
+    Each page is parsed once for both layers. Items or spans that are not
+    wanted are left empty without asking MuPDF for them at all.
+    """
+    rect = page.rect
+    crop_rect = _page_crop(page, crop_rect)
+    items = []
+    if geometry:
+        items = list(_merged_items(_page_drawings(page) or [], crop_rect, min_size))
+
+    spans = []
+    append = spans.append
+    text_dict = _text_dict(page, crop_rect) if text else {}
+    for block in text_dict.get("blocks", []):
+        for line in block.get("lines", []):
+            for span in line.get("spans", []):
+                # MuPDF's dict output always has these keys; only the
+                # rare span without them takes the slow path
+                try:
+                    text = span["text"]
+                    origin = span["origin"]
+                    size = span["size"]
+                    font = span["font"]
+                except KeyError:
+                    text = span.get("text", "")
+                    origin = span.get("origin", None)
+                    size = span.get("size", 0.0)
+                    font = span.get("font", "Unknown")
+                # isspace() is False for "", which the first test catches
+                if not text or text.isspace():
+                    continue
+                if not origin or len(origin) < 2:
+                    # sometimes origin not present; try bbox
+                    bbox = span.get("bbox", None)
+                    if bbox and len(bbox) >= 2:
+                        origin = (bbox[0], bbox[1])
+                    else:
+                        continue
+                append((text, float(size), font,
+                        (float(origin[0]), float(origin[1]))))
+
+    return {"width": rect.width, "height": rect.height,
+            "items": items, "spans": spans}
+
+
+_OPEN_PDF = {}  # pdf path -> the document _open_pdf() keeps open
+
+
+def _open_pdf(pdf_path):
+    """
+    Open pdf_path once per pool process. A process is handed many pages of
+    the same PDF in a row, and parsing the document again for each of them
+    costs more than the page itself on large files.
+    Moving on to another PDF closes the previous one and empties MuPDF's
+    store, so a process never holds the fonts and images of two files.
+    """
+    doc = _OPEN_PDF.get(pdf_path)
+    if doc is None:
+        import fitz
+        for old in _OPEN_PDF.values():
+            old.close()
+        _OPEN_PDF.clear()
+        fitz.TOOLS.store_shrink(100)
+        doc = _OPEN_PDF[pdf_path] = fitz.open(pdf_path, filetype="pdf")
+    return doc
+
+
+def _close_open_pdfs():
+    """Close what _open_pdf() keeps open, once no more pages are coming."""
+    for doc in _OPEN_PDF.values():
+        doc.close()
+    _OPEN_PDF.clear()
+
+
+def dxf_page_worker(task, doc=None):
+    """
+    Convert one page of a PDF to its own DXF file.
+    The PDF is opened from its path, see _open_pdf(), unless an open doc
+    is passed in.
+    """
+    (pdf_path, page_index, dxf_path, min_size, skip_curves, ascii_dxf,
+     bezier_segments, crop_rect, streamed, geometry, text) = task
+    if doc is None:
+        doc = _open_pdf(pdf_path)
+    ok, msg = convert_pdf_page_to_dxf_direct(
+        doc[page_index], dxf_path, min_size=min_size, skip_curves=skip_curves,
+        ascii_dxf=ascii_dxf, bezier_segments=bezier_segments, crop_rect=crop_rect,
+        streamed=streamed, geometry=geometry, text=text)
+    return page_index, ok, msg
+
+
+def extract_page_worker(task, doc=None):
+    """
+    Extract the layer data of one page of a PDF.
+    The PDF is opened from its path, see _open_pdf(), unless an open doc
+    is passed in.
+    """
+    pdf_path, page_index, crop_rect, geometry, text, min_size = task
+    if doc is None:
+        doc = _open_pdf(pdf_path)
+    return page_index, extract_page(doc[page_index], crop_rect, geometry, text, min_size)
+
+
+_STOP = None  # the stop event of a pool process, see _set_stop()
+
+
+def _set_stop(stop):
+    global _STOP
+    _STOP = stop
+
+
+def _unless_stopped(worker, task):
+    """worker(task) in a pool process, or None once the stop event is set."""
+    if _STOP is not None and _STOP.is_set():
+        return None
+    return worker(task)
+
+
+def _run_pages(worker, run):
+    """The results of a run of page tasks, converted in one pool process."""
+    return [_unless_stopped(worker, task) for task in run]
+
+
+def map_pages(worker, tasks, python_exe=None, is_canceled=None, docs=None,
+              stop=None):
+    """
+    Yield worker(task) for each task, in order.
+
+    Several pages are spread over a process pool started with python_exe
+    (QGIS' own sys.executable is not a Python interpreter on Windows).
+    Without a usable interpreter, for a few pages, or if the pool breaks,
+    the remaining tasks run in this process instead, on the documents the
+    caller already has open in docs (PDF path -> document). A PDF missing
+    from docs is opened by _open_pdf() and closed again when the tasks
+    are done, so none stays open in the calling process.
+    stop is an event of the caller's, such as a threading.Event, that
+    ends the run once set, as is_canceled() does. Either is passed on to
+    the pool processes, which then skip the pages they have not started.
+    """
+    def canceled():
+        return (stop is not None and stop.is_set()) or \
+            bool(is_canceled and is_canceled())
+
+    tasks = list(tasks)
+    done = 0
+    if len(tasks) >= POOL_MIN_PAGES and python_exe and os.path.exists(python_exe):
+        try:
+            ctx = multiprocessing.get_context("spawn")
+            ctx.set_executable(python_exe)
+            # made only now: on POSIX the event starts multiprocessing's
+            # resource tracker, which must run python_exe, not QGIS
+            pool_stop = ctx.Event()
+            max_workers = min(len(tasks), os.cpu_count() or 1, MAX_POOL_WORKERS)
+            # runs of neighbouring pages per process: they share the open
+            # document (see _open_pdf()) and much of MuPDF's font and image
+            # store, and take fewer round trips; about four runs per
+            # process still even out pages of different weight
+            chunksize = max(1, len(tasks) // (max_workers * 4))
+            runs = (tasks[i:i + chunksize] for i in range(0, len(tasks), chunksize))
+            run_pages = partial(_run_pages, worker)
+            executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx,
+                                           initializer=_set_stop, initargs=(pool_stop,))
+            pending = deque()
+            finished = False
+            try:
+                # a new run is queued as each finished one is taken
+                pending.extend(executor.submit(run_pages, run) for run in
+                               islice(runs, max_workers * RUNS_IN_FLIGHT))
+                while pending:
+                    future = pending.popleft()
+                    while True:
+                        try:
+                            results = future.result(timeout=CANCEL_POLL_INTERVAL)
+                            break
+                        except FutureTimeout:
+                            if canceled():
+                                return
+                    run = next(runs, None)
+                    if run is not None:
+                        pending.append(executor.submit(run_pages, run))
+                    for result in results:
+                        if canceled():
+                            return
+                        yield result
+                        done += 1
+                finished = True
+            finally:
+                # cancelled, or the caller raised or dropped this generator:
+                # queued runs are withdrawn and running ones stop at their
+                # next page, rather than being converted only to be thrown
+                # away (shutdown(cancel_futures=True) needs Python 3.9)
+                if not finished:
+                    pool_stop.set()
+                    for future in pending:
+                        future.cancel()
+                executor.shutdown(wait=finished)
+            return
+        except (OSError, BrokenProcessPool):
+            pass
+
+    docs = docs or {}
+    try:
+        for task in tasks[done:]:
+            if canceled():
+                return
+            # the PDF path is the first item of every task
+            yield worker(task, docs.get(task[0]))
+    finally:
+        _close_open_pdfs()
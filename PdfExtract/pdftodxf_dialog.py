@@ -7,7 +7,7 @@
 #   ✓ Progress bar inside dialog (updates safely)
 #   ✓ Page range: All pages or From–To
 #   ✓ Extract: Geometry only, Text only, or Both
-#   ✓ Output: Shapefile, GeoJSON, DXF
+#   ✓ Output: Shapefile, GeoJSON, GeoPackage, DXF
 #   ✓ Option: Load output layers into QGIS project
 #   ✓ Groups multiple files in layer panel
 #   ✓ Qt5 and Qt6 compatible
@@ -19,282 +19,251 @@ from qgis.PyQt.QtWidgets import (
     QWidget, QCheckBox, QSpinBox, QGroupBox, QFormLayout, QProgressBar,
     QFrame, QScrollArea, QDoubleSpinBox
 )
-from qgis.PyQt.QtCore import Qt, QTimer, QVariant, QRect, QPoint
-from qgis.PyQt.QtGui import QPixmap, QImage, QPainter, QPen, QColor
+from qgis.PyQt.QtCore import Qt, QTimer, QVariant, QRect, QPoint, QObject, QThread, pyqtSignal, pyqtSlot
+from qgis.PyQt.QtGui import QPixmap, QImage, QMouseEvent, QPainter, QPen, QBrush, QColor
 from qgis.core import (
-    QgsTask, QgsApplication, QgsProject,
+    QgsTask, QgsApplication, QgsMessageLog, QgsProject,
     QgsVectorLayer, QgsVectorFileWriter, QgsFields, QgsField,
     QgsFeature, QgsGeometry, QgsWkbTypes, QgsCoordinateReferenceSystem,
-    QgsPointXY, Qgis, QgsLayerTreeGroup
+    QgsPoint, Qgis, QgsLayerTreeGroup, QgsLayerTreeLayer, QgsFeatureSink,
+    QgsLineString
 )
 from qgis.utils import iface
 import os
+import pickle
+import tempfile
+import threading
+import time
 import traceback
+from collections import OrderedDict
+from itertools import islice
+
+from .dependencies import python_executable
+from .pdf_to_dxf_worker import (MIN_CURVE_SEGMENTS, dxf_page_worker, extract_page,
+                                 extract_page_worker, item_points_func, map_pages,
+                                 place_shapes)
+
+# PyMuPDF (fitz) is imported where it is used, so loading the plugin at
+# QGIS startup does not pull in its extension module
+
+try:
+    # Qt6
+    FAST_INSERT = QgsFeatureSink.Flag.FastInsert
+except AttributeError:
+    # Qt5
+    FAST_INSERT = QgsFeatureSink.FastInsert
 
 try:
-    import fitz  # PyMuPDF
-except Exception:
-    fitz = None
+    # Qt6
+    CREATE_OR_OVERWRITE_FILE = QgsVectorFileWriter.ActionOnExistingFile.CreateOrOverwriteFile
+    CREATE_OR_OVERWRITE_LAYER = QgsVectorFileWriter.ActionOnExistingFile.CreateOrOverwriteLayer
+except AttributeError:
+    # Qt5
+    CREATE_OR_OVERWRITE_FILE = QgsVectorFileWriter.CreateOrOverwriteFile
+    CREATE_OR_OVERWRITE_LAYER = QgsVectorFileWriter.CreateOrOverwriteLayer
+
+# QgsVectorFileWriter.create() (QGIS >= 3.10), looked up once
+WRITER_CREATE = getattr(QgsVectorFileWriter, "create", None)
+
+# Features buffered per addFeatures() call in the layer writers
+WRITE_BATCH_SIZE = 1000
 
+# Bytes of deferred GeoPackage text kept in memory before they spill to a
+# temporary file, see PdfToVectorTask.run()
+TEXT_SPOOL_SIZE = 16 * 1024 * 1024
+
+# Rendered preview pages kept by the crop dialog for page revisits
+PREVIEW_CACHE_SIZE = 8
+
+# Pixels rendered around the visible part of a zoomed-in preview page
+ZOOM_RENDER_MARGIN = 256
+
+# Scale of the coarse render shown while a preview page renders in full
+COARSE_RENDER_SCALE = 0.25
+
+# Shortest interval between selection redraws while dragging (about 60 Hz)
+SELECTION_PAINT_INTERVAL_NS = 16_000_000
+
+# Qt enums used by the crop preview, resolved once rather than per event
 try:
-    import ezdxf
-except Exception:
-    ezdxf = None
+    # Qt6
+    CROSS_CURSOR = Qt.CursorShape.CrossCursor
+    ALIGN_CENTER = Qt.AlignmentFlag.AlignCenter
+    WHITE = Qt.GlobalColor.white
+    KEEP_ASPECT_RATIO = Qt.AspectRatioMode.KeepAspectRatio
+    IGNORE_ASPECT_RATIO = Qt.AspectRatioMode.IgnoreAspectRatio
+    SMOOTH_TRANSFORMATION = Qt.TransformationMode.SmoothTransformation
+    FAST_TRANSFORMATION = Qt.TransformationMode.FastTransformation
+    # fitz.Pixmap.n -> QImage format
+    IMAGE_FORMATS = {1: QImage.Format.Format_Grayscale8,
+                     3: QImage.Format.Format_RGB888,
+                     4: QImage.Format.Format_RGBA8888}
+except AttributeError:
+    # Qt5
+    CROSS_CURSOR = Qt.CrossCursor
+    ALIGN_CENTER = Qt.AlignCenter
+    WHITE = Qt.white
+    KEEP_ASPECT_RATIO = Qt.KeepAspectRatio
+    IGNORE_ASPECT_RATIO = Qt.IgnoreAspectRatio
+    SMOOTH_TRANSFORMATION = Qt.SmoothTransformation
+    FAST_TRANSFORMATION = Qt.FastTransformation
+    IMAGE_FORMATS = {1: QImage.Format_Grayscale8,
+                     3: QImage.Format_RGB888,
+                     4: QImage.Format_RGBA8888}
+
+if hasattr(QMouseEvent, 'position'):
+    # Qt6
+    def _event_pos(event):
+        return event.position().toPoint()
+else:
+    # Qt5
+    def _event_pos(event):
+        return event.pos()
+
+if hasattr(QPixmap, 'deviceIndependentSize'):
+    # Qt >= 6.2
+    def _logical_size(pixmap):
+        return pixmap.deviceIndependentSize().toSize()
+else:
+    # Qt5
+    def _logical_size(pixmap):
+        return pixmap.size() / pixmap.devicePixelRatio()
 
 # =========================================================
-# DXF EXPORT HELPER (using ezdxf)
+# CROP PREVIEW DIALOG
 # =========================================================
 
+# (path, mtime, size) -> page cache of CropPreviewDialog; kept across
+# dialogs so reopening the crop preview shows its pages at once, but only
+# for the last PDF previewed
+_PREVIEW_CACHE = {}
 
-def clip_line_to_rect(x1, y1, x2, y2, rect):
+
+def _preview_page_cache(pdf_path):
+    """The page cache for pdf_path, new if the file changed on disk."""
+    try:
+        st = os.stat(pdf_path)
+    except OSError:
+        return OrderedDict()
+    key = (pdf_path, st.st_mtime_ns, st.st_size)
+    cache = _PREVIEW_CACHE.get(key)
+    if cache is None:
+        _PREVIEW_CACHE.clear()
+        cache = _PREVIEW_CACHE[key] = OrderedDict()
+    return cache
+
+
+class PageRenderWorker(QObject):
     """
-    Clip a line segment to a rectangle using Cohen-Sutherland algorithm.
-    Returns (clipped_x1, clipped_y1, clipped_x2, clipped_y2) or None if line is completely outside.
+    Renders preview pages on the crop dialog's render thread. It opens its
+    own copy of the PDF there, so the GUI thread never waits on MuPDF.
     """
-    # Define region codes
-    INSIDE = 0  # 0000
-    LEFT = 1    # 0001
-    RIGHT = 2   # 0010
-    BOTTOM = 4  # 0100
-    TOP = 8     # 1000
-
-    def compute_code(x, y):
-        code = INSIDE
-        if x < rect.x0:
-            code |= LEFT
-        elif x > rect.x1:
-            code |= RIGHT
-        if y < rect.y0:
-            code |= BOTTOM
-        elif y > rect.y1:
-            code |= TOP
-        return code
-
-    code1 = compute_code(x1, y1)
-    code2 = compute_code(x2, y2)
-
-    while True:
-        # Both endpoints inside - accept
-        if code1 == 0 and code2 == 0:
-            return (x1, y1, x2, y2)
-
-        # Both endpoints share an outside region - reject
-        if code1 & code2:
-            return None
-
-        # Line needs clipping
-        # Pick an endpoint that is outside
-        code_out = code1 if code1 != 0 else code2
-
-        # Find intersection point
-        if code_out & TOP:
-            x = x1 + (x2 - x1) * (rect.y1 - y1) / (y2 - y1)
-            y = rect.y1
-        elif code_out & BOTTOM:
-            x = x1 + (x2 - x1) * (rect.y0 - y1) / (y2 - y1)
-            y = rect.y0
-        elif code_out & RIGHT:
-            y = y1 + (y2 - y1) * (rect.x1 - x1) / (x2 - x1)
-            x = rect.x1
-        elif code_out & LEFT:
-            y = y1 + (y2 - y1) * (rect.x0 - x1) / (x2 - x1)
-            x = rect.x0
-
-        # Replace the outside point with the intersection
-        if code_out == code1:
-            x1, y1 = x, y
-            code1 = compute_code(x1, y1)
-        else:
-            x2, y2 = x, y
-            code2 = compute_code(x2, y2)
+    # page index, render scale, clip (None for the whole page), rendered image
+    finished = pyqtSignal(int, float, object, QImage)
 
+    def __init__(self, pdf_path):
+        super().__init__()
+        self.pdf_path = pdf_path
+        self.doc = None
+        self._gray_pages = {}  # page index -> whether it has no colour
+        self._last_page = None  # page of the previous render
+
+    def _is_gray(self, page_index):
+        """Whether a page renders without colour, judged from a tiny render."""
+        gray = self._gray_pages.get(page_index)
+        if gray is None:
+            import fitz
+            probe = self.doc[page_index].get_pixmap(
+                matrix=fitz.Matrix(0.1, 0.1), alpha=False)
+            s = probe.samples
+            gray = probe.n == 3 and s[0::3] == s[1::3] == s[2::3]
+            self._gray_pages[page_index] = gray
+        return gray
+
+    @pyqtSlot(int, float, object)
+    def render(self, page_index, render_scale, clip):
+        """Render a page, or only its clip (x0, y0, x1, y1) in PDF points."""
+        import fitz
+        try:
+            if self.doc is None:
+                self.doc = fitz.open(self.pdf_path)
+            if page_index != self._last_page:
+                # moving to another page: let MuPDF drop the fonts and
+                # images it kept for the previous one, so the store does
+                # not keep growing as the user pages through
+                if self._last_page is not None:
+                    fitz.TOOLS.store_shrink(100)
+                self._last_page = page_index
+            # colourless pages (scans, plain line work) are rendered with one
+            # byte per pixel instead of three
+            gray = self._is_gray(page_index)
+            mat = fitz.Matrix(render_scale, render_scale)
+            pix = self.doc[page_index].get_pixmap(
+                matrix=mat, alpha=False, clip=fitz.Rect(clip) if clip else None,
+                colorspace=fitz.csGRAY if gray else fitz.csRGB)
+        except Exception:
+            return
 
-def convert_pdf_page_to_dxf_direct(page, output_dxf_path, crop_rect=None, min_size=0.0, skip_curves=False):
-    """Convert PDF page directly to DXF using ezdxf (better quality)."""
-    if ezdxf is None:
-        return False, "ezdxf not installed"
+        img_format = IMAGE_FORMATS[pix.n]
+        # samples_mv is a view of MuPDF's buffer where samples would be a
+        # bytes copy of it; copy() then gives the image the only copy it
+        # needs to outlive pix on the GUI thread
+        qimg = QImage(pix.samples_mv, pix.width,
+                      pix.height, pix.stride, img_format).copy()
+        # free MuPDF's buffer now rather than when the next render replaces it
+        del pix
+        self.finished.emit(page_index, render_scale, clip, qimg)
 
-    try:
-        dxf = ezdxf.new()
-        # Create layers
-        dxf.layers.new(name='PDF_GEOMETRY', dxfattribs={'color': 7})
-        dxf.layers.new(name='PDF_TEXT', dxfattribs={'color': 1})
-
-        msp = dxf.modelspace()
-        page_height = page.rect.height
-
-        # 1. Extract Drawings
-        paths = page.get_drawings()
-
-        for path in paths:
-            # Check if path intersects with crop region (not full containment)
-            if crop_rect:
-                path_rect = path.get("rect")
-                if path_rect:
-                    # Check if path intersects the crop region
-                    if not (path_rect.x0 <= crop_rect.x1 and path_rect.x1 >= crop_rect.x0 and
-                            path_rect.y0 <= crop_rect.y1 and path_rect.y1 >= crop_rect.y0):
-                        continue  # Skip paths that don't intersect crop region
+    def close(self):
+        if self.doc is not None:
+            self.doc.close()
+            self.doc = None
 
-                try:
-                    cmd = item[0]
-                    if isinstance(cmd, bytes):
-                        cmd = cmd.decode("utf-8", "ignore")
-
-                    # Check size for filtering logic
-                    # Calculate bounding box of the item if possible or approximate size
-                    # For simple lines/curves we can check length or bounds
-                    pass_size_check = True
-                    if min_size > 0:
-                        # item structure depends on cmd
-                        # l, c, re/rect
-                        bbox_w = 0
-                        bbox_h = 0
-                        if str(cmd).lower() == "l":
-                            p1, p2 = item[1], item[2]
-                            bbox_w = abs(p1[0] - p2[0])
-                            bbox_h = abs(p1[1] - p2[1])
-                        elif str(cmd).lower() == "c":
-                            # bezier control points
-                            xs = [pt[0] for pt in item[1:] if pt]
-                            ys = [pt[1] for pt in item[1:] if pt]
-                            if xs and ys:
-                                bbox_w = max(xs) - min(xs)
-                                bbox_h = max(ys) - min(ys)
-                        elif str(cmd).lower() in ("re", "rect"):
-                            rect = item[1]
-                            bbox_w = rect.width
-                            bbox_h = rect.height
-
-                        if max(bbox_w, bbox_h) < min_size:
-                            pass_size_check = False
-
-                    if not pass_size_check:
-                        continue
-
-                    # LINE
-                    if str(cmd).lower() == "l":
-                        p1 = item[1]
-                        p2 = item[2]
-
-                        # Clip line to crop region if needed
-                        if crop_rect:
-                            clipped = clip_line_to_rect(
-                                p1[0], p1[1], p2[0], p2[1], crop_rect)
-                            if clipped is None:
-                                continue  # Line is completely outside crop region
-
-                            x1, y1, x2, y2 = clipped
-                            msp.add_line(
-                                (x1, page_height - y1),
-                                (x2, page_height - y2),
-                                dxfattribs={'layer': 'PDF_GEOMETRY'}
-                            )
-                        else:
-                            msp.add_line(
-                                (p1[0], page_height - p1[1]),
-                                (p2[0], page_height - p2[1]),
-                                dxfattribs={'layer': 'PDF_GEOMETRY'}
-                            )
-
-                    # CURVE
-                    elif str(cmd).lower() == "c":
-                        if skip_curves:
-                            continue
-
-                        control_points = []
-                        # For curves, check if all points are within crop region
-                        all_inside = True
-                        for pt in item[1:]:
-                            if crop_rect:
-                                if not (crop_rect.x0 <= pt[0] <= crop_rect.x1 and
-                                        crop_rect.y0 <= pt[1] <= crop_rect.y1):
-                                    all_inside = False
-                                    break
-
-                        if not all_inside and crop_rect:
-                            continue  # Skip curves that extend outside crop region
-
-                        for pt in item[1:]:
-                            control_points.append((pt[0], page_height - pt[1]))
-                        if len(control_points) >= 2:
-                            msp.add_spline(control_points, degree=3, dxfattribs={
-                                           'layer': 'PDF_GEOMETRY'})
-
-                    # RECTANGLE
-                    elif str(cmd).lower() in ("re", "rect"):
-                        rect = item[1]
-
-                        if crop_rect:
-                            # For rectangles, check if fully contained within crop
-                            if not (rect.x0 >= crop_rect.x0 and rect.x1 <= crop_rect.x1 and
-                                    rect.y0 >= crop_rect.y0 and rect.y1 <= crop_rect.y1):
-                                continue  # Skip rectangles not fully within crop
-
-                        x0, y0, x1, y1 = rect.x0, rect.y0, rect.x1, rect.y1
-
-                        points = [
-                            (x0, page_height - y0),
-                            (x1, page_height - y0),
-                            (x1, page_height - y1),
-                            (x0, page_height - y1),
-                            (x0, page_height - y0)
-                        ]
-                        msp.add_lwpolyline(points, dxfattribs={
-                                           'layer': 'PDF_GEOMETRY'})
-
-                except Exception:
-                    continue
 
-        # 2. Extract Text
-        try:
-            if crop_rect:
-                # Use clip parameter to extract only text in crop region
-                text_dict = page.get_text("dict", clip=crop_rect)
-            else:
-                text_dict = page.get_text("dict")
-        except Exception:
-            text_dict = {}
+class SelectionLabel(QLabel):
+    """
+    Image label that paints the crop selection over its pixmap, so moving
+    the selection never copies or repaints into the page pixmap itself.
+    """
 
-        for block in text_dict.get("blocks", []):
-            if block.get("type") != 0:
-                continue
-            for line in block.get("lines", []):
-                for span in line.get("spans", []):
-                    try:
-                        text = span.get("text", "").strip()
-                        if not text:
-                            continue
-
-                        size = span.get("size", 10)
-                        origin = span.get("origin", (0, 0))
-                        insert_point = (origin[0], page_height - origin[1])
-
-                        msp.add_mtext(
-                            text,
-                            dxfattribs={
-                                'char_height': size,
-                                'insert': insert_point,
-                                'attachment_point': 7,  # BottomLeft
-                                'layer': 'PDF_TEXT'
-                            }
-                        )
-                    except Exception:
-                        continue
-
-        dxf.saveas(output_dxf_path)
-        return True, None
-
-    except Exception as e:
-        return False, str(e)
+    def __init__(self):
+        super().__init__()
+        self.selection = None  # QRect in pixmap coordinates, or None
+        # built once; paintEvent() runs for every selection change
+        self._sel_pen = QPen(QColor(0, 120, 212), 2)
+        self._sel_brush = QBrush(QColor(0, 120, 212, 30))
+
+    def set_selection(self, rect):
+        """
+        Move the selection to rect (or remove it, for None). Only the area
+        the old and new rectangles cover is repainted, not the whole page.
+        """
+        dirty = self.selection
+        self.selection = rect
+        if rect is not None:
+            dirty = rect if dirty is None else dirty.united(rect)
+        if dirty is not None:
+            # the pen straddles the rectangle's edges
+            self.update(dirty.adjusted(-2, -2, 2, 2))
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.selection is None:
+            return
+        painter = QPainter(self)
+        # Draw semi-transparent overlay
+        painter.setPen(self._sel_pen)
+        painter.setBrush(self._sel_brush)
+        painter.drawRect(self.selection)
+        painter.end()
 
 
-# =========================================================
-# CROP PREVIEW DIALOG
-# =========================================================
 class CropPreviewDialog(QDialog):
     """Dialog for selecting a crop region on a PDF page preview."""
 
+    # page index, render scale, clip; handled by PageRenderWorker.render()
+    request_render = pyqtSignal(int, float, object)
+
     def __init__(self, pdf_path, existing_crop_rect=None, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Select Crop Region")
@@ -316,13 +285,63 @@ class CropPreviewDialog(QDialog):
         self.offset_y = 0
 
         # Store the original rendered pixmap
+        # Both are rendered at the screen's device pixel ratio and carry it,
+        # so sizes in widget (logical) pixels come from _logical_size()
         self.original_pixmap = None
         self.base_pixmap = None  # Zoomed version
+        # PDF points per logical base_pixmap pixel, kept by
+        # _set_base_pixmap() for the mouse handlers
+        self._inv_display_scale = 1.0
+        # (page index, display scale, device pixel ratio) -> original_pixmap,
+        # least recent first
+        self._page_cache = _preview_page_cache(pdf_path)
+        # (page index, render scale) of page renders requested for the
+        # cache, as opposed to zoomed renders, -> (cache key, pixel ratio)
+        self._page_renders = {}
+        # (page index, render scale) of coarse renders shown until their
+        # page render arrives -> (that page render's key, display scale,
+        # pixel ratio)
+        self._coarse_renders = {}
+
+        # Pages are rendered off the GUI thread; finished renders come back
+        # through _on_page_rendered() as queued signals
+        self._render_thread = QThread(self)
+        self._render_worker = PageRenderWorker(pdf_path)
+        self._render_worker.moveToThread(self._render_thread)
+        self.request_render.connect(self._render_worker.render)
+        self._render_worker.finished.connect(self._on_page_rendered)
+        self._render_thread.start()
+
+        # Restarted by every zoom step; only the last one is scaled smoothly
+        # (or, zoomed in, rendered again)
+        self._smooth_timer = QTimer(self)
+        self._smooth_timer.setSingleShot(True)
+        self._smooth_timer.setInterval(120)
+        self._smooth_timer.timeout.connect(self._smooth_zoom)
+
+        # Selection redraws are limited to about 60 per second; a skipped
+        # one is flushed by a single-shot timer so the last position shows
+        self._last_paint_ns = 0
+        self._paint_pending = False
 
         # Page navigation
         self.current_page = 0  # 0-indexed
         self.total_pages = 0
 
+        # Opened once for all page navigation; _load_pdf_preview() reports
+        # a failure here once the UI exists
+        self.fitz_doc = None
+        self._open_error = None
+        try:
+            import fitz  # PyMuPDF
+            self.fitz_doc = fitz.open(pdf_path)
+            self.total_pages = len(self.fitz_doc)
+        except ImportError:
+            self._open_error = "PyMuPDF not available"
+        except Exception as e:
+            self._open_error = f"Failed to load PDF preview: {e}"
+
+        self._ui_ready = False  # set once _build_ui() has made the widgets
         self._build_ui()
         self._load_pdf_preview()
 
@@ -335,22 +354,21 @@ class CropPreviewDialog(QDialog):
         scroll.setWidgetResizable(False)
 
         # Image label (will draw the PDF and selection)
-        self.image_label = QLabel()
+        self.image_label = SelectionLabel()
         self.image_label.setMouseTracking(True)
         self.image_label.setScaledContents(False)
 
         # Set crosshair cursor
-        try:
-            # Qt6
-            self.image_label.setCursor(Qt.CursorShape.CrossCursor)
-        except AttributeError:
-            # Qt5
-            self.image_label.setCursor(Qt.CrossCursor)
+        self.image_label.setCursor(CROSS_CURSOR)
 
         self.image_label.mousePressEvent = self._on_mouse_press
         self.image_label.mouseMoveEvent = self._on_mouse_move
         self.image_label.mouseReleaseEvent = self._on_mouse_release
         scroll.setWidget(self.image_label)
+        # zoomed in, scrolling reveals parts of the page still to render
+        scroll.horizontalScrollBar().valueChanged.connect(self._on_scrolled)
+        scroll.verticalScrollBar().valueChanged.connect(self._on_scrolled)
+        self.scroll = scroll
 
         layout.addWidget(scroll)
 
@@ -364,10 +382,7 @@ class CropPreviewDialog(QDialog):
         self.btn_prev_page.clicked.connect(self._prev_page)
 
         self.lbl_page = QLabel("1 / 1")
-        try:
-            self.lbl_page.setAlignment(Qt.AlignCenter)
-        except AttributeError:
-            self.lbl_page.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.lbl_page.setAlignment(ALIGN_CENTER)
         self.lbl_page.setMinimumWidth(80)
 
         self.btn_next_page = QPushButton("▶")
@@ -390,10 +405,7 @@ class CropPreviewDialog(QDialog):
         btn_zoom_out.clicked.connect(self._zoom_out)
 
         self.lbl_zoom = QLabel("100%")
-        try:
-            self.lbl_zoom.setAlignment(Qt.AlignCenter)
-        except AttributeError:
-            self.lbl_zoom.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.lbl_zoom.setAlignment(ALIGN_CENTER)
         self.lbl_zoom.setMinimumWidth(60)
 
         btn_zoom_in = QPushButton("+")
@@ -436,39 +448,34 @@ class CropPreviewDialog(QDialog):
 
         layout.addLayout(btn_row)
         self.setLayout(layout)
+        self._ui_ready = True
 
     def _load_pdf_preview(self, page_num=None):
         """Load specified page of PDF as an image, scaled to fit window."""
-        if fitz is None:
-            QMessageBox.warning(self, "Error", "PyMuPDF not available")
+        if self.fitz_doc is None:
+            QMessageBox.warning(self, "Error", self._open_error)
             self.reject()
             return
 
         try:
-            doc = fitz.open(self.pdf_path)
-            if len(doc) == 0:
+            if self.total_pages == 0:
                 QMessageBox.warning(self, "Error", "PDF has no pages")
                 self.reject()
                 return
 
-            # Track total pages
-            self.total_pages = len(doc)
-
             # Use specified page or current_page
             if page_num is not None:
                 self.current_page = max(0, min(page_num, self.total_pages - 1))
 
             # Update page label and button states
-            if hasattr(self, 'lbl_page'):
+            if self._ui_ready:
                 self.lbl_page.setText(
                     f"{self.current_page + 1} / {self.total_pages}")
-            if hasattr(self, 'btn_prev_page'):
                 self.btn_prev_page.setEnabled(self.current_page > 0)
-            if hasattr(self, 'btn_next_page'):
                 self.btn_next_page.setEnabled(
                     self.current_page < self.total_pages - 1)
 
-            page = doc[self.current_page]
+            page = self.fitz_doc[self.current_page]
             self.page_rect = page.rect
 
             # Calculate scale to fit within dialog (accounting for UI elements)
@@ -483,72 +490,154 @@ class CropPreviewDialog(QDialog):
             scale_h = target_height / self.page_rect.height
             scale = min(scale_w, scale_h)
 
-            # Render at 2x resolution for better quality (high-DPI rendering)
-            # This creates a sharper image that we'll scale down smoothly
-            render_scale = scale * 2.0
-            mat = fitz.Matrix(render_scale, render_scale)
-            pix = page.get_pixmap(matrix=mat, alpha=False)
+            # Render at display size in device pixels: MuPDF antialiases
+            # already, and the pixmap is shown one pixel per device pixel,
+            # so on a HiDPI screen it stays as sharp as on any other
+            dpr = self.devicePixelRatioF()
+            render_scale = scale * dpr
+            render_key = (self.current_page, round(render_scale, 3))
+            key = (self.current_page, round(scale, 3), dpr)
+            cached = self._page_cache.get(key)
+            if cached is not None:
+                self._page_cache.move_to_end(key)
+                self._show_page_pixmap(cached, scale, page)
+                return
 
-            # Convert to QImage with Qt5/Qt6 compatibility
-            try:
-                # Qt5
-                img_format = QImage.Format_RGB888 if pix.n == 3 else QImage.Format_RGBA8888
-            except AttributeError:
-                # Qt6
-                img_format = QImage.Format.Format_RGB888 if pix.n == 3 else QImage.Format.Format_RGBA8888
+            # Until the render arrives, show the previous page stretched to
+            # this page's size (or a blank page) as a placeholder
+            device_width = int(self.page_rect.width * render_scale)
+            device_height = int(self.page_rect.height * render_scale)
+            if self.original_pixmap is not None:
+                placeholder = self.original_pixmap.scaled(
+                    device_width, device_height,
+                    IGNORE_ASPECT_RATIO, FAST_TRANSFORMATION)
+            else:
+                placeholder = QPixmap(device_width, device_height)
+                placeholder.fill(WHITE)
+            placeholder.setDevicePixelRatio(dpr)
+            self._show_page_pixmap(placeholder, scale, page)
+            # a coarse render first, which arrives (in order) well before
+            # the page render it stands in for
+            coarse_scale = render_scale * COARSE_RENDER_SCALE
+            self._coarse_renders[(self.current_page, round(coarse_scale, 3))] = (
+                render_key, scale, dpr)
+            self.request_render.emit(self.current_page, coarse_scale, None)
+            self._page_renders[render_key] = (key, dpr)
+            self.request_render.emit(self.current_page, render_scale, None)
 
-            qimg = QImage(pix.samples, pix.width,
-                          pix.height, pix.stride, img_format)
+        except Exception as e:
+            QMessageBox.warning(
+                self, "Error", f"Failed to load PDF preview: {e}")
+            self.reject()
 
-            # Create high-res pixmap and scale down smoothly for display
-            high_res_pixmap = QPixmap.fromImage(qimg)
+    def _on_page_rendered(self, page_index, render_scale, clip, qimg):
+        """Scale a finished render to display size, cache it and show it if still current."""
+        render_key = (page_index, round(render_scale, 3))
+        if render_key in self._coarse_renders:
+            page_key, scale, dpr = self._coarse_renders.pop(render_key)
+            # shown stretched to display size unless the user has moved on
+            # or the page render has already replaced the placeholder
+            if page_index == self.current_page and page_key in self._page_renders \
+                    and self.fitz_doc is not None:
+                page = self.fitz_doc[page_index]
+                pixmap = QPixmap.fromImage(qimg).scaled(
+                    int(page.rect.width * scale * dpr), int(page.rect.height * scale * dpr),
+                    IGNORE_ASPECT_RATIO, FAST_TRANSFORMATION)
+                pixmap.setDevicePixelRatio(dpr)
+                self._show_page_pixmap(pixmap, scale, page)
+            return
+        entry = self._page_renders.pop(render_key, None)
+        if entry is None:
+            # a zoomed render of the visible area from _smooth_zoom(), already
+            # at display size; dropped if the user has moved on since
+            dpr = self.base_pixmap.devicePixelRatio() if self.base_pixmap else 1.0
+            display_scale = self.base_scale_factor * self.zoom_level
+            if page_index == self.current_page and self.zoom_level > 1.0 and \
+                    abs(render_scale - display_scale * dpr) < 1e-6:
+                # drawn in logical pixels, one image pixel per device pixel
+                qimg.setDevicePixelRatio(dpr)
+                painter = QPainter(self.base_pixmap)
+                painter.drawImage(QPoint(int(clip[0] * display_scale),
+                                         int(clip[1] * display_scale)), qimg)
+                painter.end()
+                self._update_display()
+            return
+        if self.fitz_doc is None:
+            # arrived after the dialog was closed
+            return
+        # rendered at display size already, see _load_pdf_preview()
+        key, dpr = entry
+        pixmap = QPixmap.fromImage(qimg)
+        pixmap.setDevicePixelRatio(dpr)
 
-            # Scale down to target size with smooth transformation
-            display_width = int(self.page_rect.width * scale)
-            display_height = int(self.page_rect.height * scale)
+        self._page_cache[key] = pixmap
+        if len(self._page_cache) > PREVIEW_CACHE_SIZE:
+            self._page_cache.popitem(last=False)
 
-            try:
-                # Qt5
-                self.original_pixmap = high_res_pixmap.scaled(
-                    display_width, display_height,
-                    Qt.KeepAspectRatio,
-                    Qt.SmoothTransformation
-                )
-            except AttributeError:
-                # Qt6
-                self.original_pixmap = high_res_pixmap.scaled(
-                    display_width, display_height,
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation
-                )
+        # a render for a page the user has already left is only cached
+        if page_index != self.current_page:
+            return
+        # swap in under the current zoom, keeping any selection
+        self.original_pixmap = pixmap
+        if self.zoom_level > 1.0:
+            # zoomed in, the page is rendered again at the zoom level
+            self._set_base_pixmap(self._zoomed_pixmap(smooth=False))
+            self._smooth_timer.start()
+        else:
+            self._set_base_pixmap(self._zoomed_pixmap())
+        self._update_display()
 
-            self.base_pixmap = self.original_pixmap.copy()
+    def done(self, result):
+        """Stop the render thread however the dialog is closed."""
+        self._render_thread.quit()
+        self._render_thread.wait()
+        self._render_worker.close()
+        self._close_doc()
+        super().done(result)
 
-            # Calculate scale factor (display pixels per PDF point)
-            # This is the scale we calculated, not from the high-res render
-            self.base_scale_factor = scale
+    def _show_page_pixmap(self, pixmap, scale, page):
+        """Display a rendered page, fresh or from the page cache."""
+        self.original_pixmap = pixmap
 
-            # Store page and doc reference for re-rendering at different zooms
-            self.fitz_page = page
-            self.fitz_doc = doc
-            self.base_scale = scale
+        # Calculate scale factor (display pixels per PDF point)
+        self.base_scale_factor = scale
+        self._set_base_pixmap(self.original_pixmap)
 
-            # Initialize the display properly (without any selection overlay)
-            self.image_label.setPixmap(self.base_pixmap)
-            self.image_label.resize(self.base_pixmap.size())
+        # Store page reference for re-rendering at different zooms
+        self.fitz_page = page
+        self.base_scale = scale
 
-        except Exception as e:
-            QMessageBox.warning(
-                self, "Error", f"Failed to load PDF preview: {e}")
-            self.reject()
+        self._update_display()
 
-    def closeEvent(self, event):
-        """Clean up fitz document when dialog closes."""
-        if hasattr(self, 'fitz_doc') and self.fitz_doc:
+    def _set_base_pixmap(self, pixmap):
+        """Show pixmap as base_pixmap, caching what the mouse handlers need."""
+        self.base_pixmap = pixmap
+        self._inv_display_scale = 1.0 / (self.base_scale_factor * self.zoom_level)
+
+        # Mouse events are clamped to the pixmap by a function made for its
+        # size, which replaces the method on this instance until the next
+        # pixmap; it runs for every mouse move while selecting
+        size = _logical_size(pixmap)
+
+        def clamp_to_pixmap(widget_pos, _w=size.width(), _h=size.height()):
+            x = widget_pos.x()
+            y = widget_pos.y()
+            return QPoint(0 if x < 0 else _w if x > _w else x,
+                          0 if y < 0 else _h if y > _h else y)
+        self._widget_to_pixmap_coords = clamp_to_pixmap
+
+    def _close_doc(self):
+        """Close the fitz document kept open for page navigation."""
+        if self.fitz_doc:
             try:
                 self.fitz_doc.close()
-            except:
-                pass
+            except ValueError:
+                pass  # already closed
+            self.fitz_doc = None
+
+    def closeEvent(self, event):
+        """Clean up fitz document when dialog closes."""
+        self._close_doc()
         super().closeEvent(event)
 
     def showEvent(self, event):
@@ -580,25 +669,17 @@ class CropPreviewDialog(QDialog):
             self._update_display()
 
     def _widget_to_pixmap_coords(self, widget_pos):
-        """Convert widget coordinates to pixmap coordinates."""
-        if not self.base_pixmap:
-            return None
-
-        # Since we're using setWidgetResizable(False), the widget size equals pixmap size
-        # Just clamp to bounds
-        pixmap_x = max(0, min(widget_pos.x(), self.base_pixmap.width()))
-        pixmap_y = max(0, min(widget_pos.y(), self.base_pixmap.height()))
-
-        return QPoint(int(pixmap_x), int(pixmap_y))
+        """
+        Convert widget coordinates to pixmap coordinates. This is only
+        reached before the first pixmap; _set_base_pixmap() replaces it.
+        """
+        # Since we're using setWidgetResizable(False), the widget size
+        # equals pixmap size, so the replacement just clamps to bounds
+        return None
 
     def _on_mouse_press(self, event):
         """Start selection."""
-        try:
-            # Qt6
-            pos = event.position().toPoint()
-        except AttributeError:
-            # Qt5
-            pos = event.pos()
+        pos = _event_pos(event)
 
         # Convert to pixmap coordinates
         pixmap_pos = self._widget_to_pixmap_coords(pos)
@@ -614,12 +695,7 @@ class CropPreviewDialog(QDialog):
         if not self.selecting:
             return
 
-        try:
-            # Qt6
-            pos = event.position().toPoint()
-        except AttributeError:
-            # Qt5
-            pos = event.pos()
+        pos = _event_pos(event)
 
         # Convert to pixmap coordinates
         pixmap_pos = self._widget_to_pixmap_coords(pos)
@@ -627,19 +703,27 @@ class CropPreviewDialog(QDialog):
             return
 
         self.current_point = pixmap_pos
-        self._update_display()
+        now = time.monotonic_ns()
+        if now - self._last_paint_ns > SELECTION_PAINT_INTERVAL_NS:
+            self._last_paint_ns = now
+            self._update_selection()
+        elif not self._paint_pending:
+            self._paint_pending = True
+            QTimer.singleShot(SELECTION_PAINT_INTERVAL_NS // 1_000_000,
+                              self._flush_selection)
+
+    def _flush_selection(self):
+        """Draw a selection update skipped by the mouse-move rate limit."""
+        self._paint_pending = False
+        self._last_paint_ns = time.monotonic_ns()
+        self._update_selection()
 
     def _on_mouse_release(self, event):
         """Finish selection."""
         if not self.selecting:
             return
 
-        try:
-            # Qt6
-            pos = event.position().toPoint()
-        except AttributeError:
-            # Qt5
-            pos = event.pos()
+        pos = _event_pos(event)
 
         # Convert to pixmap coordinates
         pixmap_pos = self._widget_to_pixmap_coords(pos)
@@ -664,15 +748,15 @@ class CropPreviewDialog(QDialog):
 
         # Convert to PDF coordinates (account for zoom)
         # The display scale is base_scale_factor * zoom_level
-        display_scale = self.base_scale_factor * self.zoom_level
-        pdf_x1 = x1 / display_scale
-        pdf_y1 = y1 / display_scale
-        pdf_x2 = x2 / display_scale
-        pdf_y2 = y2 / display_scale
+        inv_scale = self._inv_display_scale
+        pdf_x1 = x1 * inv_scale
+        pdf_y1 = y1 * inv_scale
+        pdf_x2 = x2 * inv_scale
+        pdf_y2 = y2 * inv_scale
 
-        # Create fitz.Rect
-        if fitz:
-            self.crop_rect = fitz.Rect(pdf_x1, pdf_y1, pdf_x2, pdf_y2)
+        # Create fitz.Rect; the preview already loaded PyMuPDF
+        import fitz
+        self.crop_rect = fitz.Rect(pdf_x1, pdf_y1, pdf_x2, pdf_y2)
 
     def _prev_page(self):
         """Navigate to previous page."""
@@ -708,24 +792,10 @@ class CropPreviewDialog(QDialog):
         if not self.original_pixmap:
             return
 
-        # Scale the original pixmap
-        new_width = int(self.original_pixmap.width() * self.zoom_level)
-        new_height = int(self.original_pixmap.height() * self.zoom_level)
-
-        try:
-            # Qt5
-            self.base_pixmap = self.original_pixmap.scaled(
-                new_width, new_height,
-                Qt.KeepAspectRatio,
-                Qt.SmoothTransformation
-            )
-        except AttributeError:
-            # Qt6
-            self.base_pixmap = self.original_pixmap.scaled(
-                new_width, new_height,
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation
-            )
+        # Scale the original pixmap; a fast scale first, the smooth one
+        # once the zoom buttons have been left alone for a moment
+        self._set_base_pixmap(self._zoomed_pixmap(smooth=False))
+        self._smooth_timer.start()
 
         # Update zoom label
         self.lbl_zoom.setText(f"{int(self.zoom_level * 100)}%")
@@ -736,8 +806,47 @@ class CropPreviewDialog(QDialog):
         self.selecting = False
 
         # Update display
-        self.image_label.setPixmap(self.base_pixmap)
-        self.image_label.resize(self.base_pixmap.size())
+        self._update_display()
+
+    def _on_scrolled(self, value):
+        if self.zoom_level > 1.0:
+            self._smooth_timer.start()
+
+    def _smooth_zoom(self):
+        """Replace the fast zoom scale with a smooth one, see _apply_zoom()."""
+        if not self.original_pixmap:
+            return
+        if self.zoom_level > 1.0:
+            # upscaling pixels only blurs them; have MuPDF render the page
+            # at this zoom instead, see _on_page_rendered(). Only the
+            # visible part plus a margin is rendered, however large the
+            # zoomed page gets.
+            display_scale = self.base_scale_factor * self.zoom_level
+            viewport = self.scroll.viewport()
+            x = self.scroll.horizontalScrollBar().value() - ZOOM_RENDER_MARGIN
+            y = self.scroll.verticalScrollBar().value() - ZOOM_RENDER_MARGIN
+            clip = (max(0, x) / display_scale, max(0, y) / display_scale,
+                    (x + viewport.width() + 2 * ZOOM_RENDER_MARGIN) / display_scale,
+                    (y + viewport.height() + 2 * ZOOM_RENDER_MARGIN) / display_scale)
+            # the clip is in logical pixels, the render in device pixels
+            self.request_render.emit(
+                self.current_page,
+                display_scale * self.original_pixmap.devicePixelRatio(), clip)
+            return
+        self._set_base_pixmap(self._zoomed_pixmap())
+        self._update_display()
+
+    def _zoomed_pixmap(self, smooth=True):
+        """original_pixmap scaled to the current zoom level."""
+        # scaled in device pixels, keeping the pixel ratio
+        new_width = int(self.original_pixmap.width() * self.zoom_level)
+        new_height = int(self.original_pixmap.height() * self.zoom_level)
+
+        pixmap = self.original_pixmap.scaled(
+            new_width, new_height, KEEP_ASPECT_RATIO,
+            SMOOTH_TRANSFORMATION if smooth else FAST_TRANSFORMATION)
+        pixmap.setDevicePixelRatio(self.original_pixmap.devicePixelRatio())
+        return pixmap
 
     def _clear_selection(self):
         """Clear the current selection."""
@@ -752,26 +861,30 @@ class CropPreviewDialog(QDialog):
         if self.base_pixmap is None:
             return
 
-        # Create a copy of the base pixmap
-        display_pixmap = QPixmap(self.base_pixmap)
-
-        # Draw selection rectangle if active
-        if self.start_point and self.current_point:
-            painter = QPainter(display_pixmap)
-
-            # Draw semi-transparent overlay
-            painter.setPen(QPen(QColor(0, 120, 212), 2))
-            painter.setBrush(QColor(0, 120, 212, 30))
-
-            x1 = min(self.start_point.x(), self.current_point.x())
-            y1 = min(self.start_point.y(), self.current_point.y())
-            width = abs(self.current_point.x() - self.start_point.x())
-            height = abs(self.current_point.y() - self.start_point.y())
-
-            painter.drawRect(x1, y1, width, height)
-            painter.end()
-
-        self.image_label.setPixmap(display_pixmap)
+        # Pixmap, size and selection change under a single repaint, which
+        # setUpdatesEnabled(True) schedules; QPixmap is implicitly shared,
+        # so setPixmap() does not copy the pixels
+        label = self.image_label
+        label.setUpdatesEnabled(False)
+        label.setPixmap(self.base_pixmap)
+        label.resize(_logical_size(self.base_pixmap))
+        self._update_selection()
+        label.setUpdatesEnabled(True)
+
+    def _update_selection(self):
+        """Redraw only the selection, which the label paints over the page."""
+        start, current = self.start_point, self.current_point
+        if start is not None and current is not None:
+            # bounds by comparison rather than min/max/abs calls; this runs
+            # for every redraw while dragging
+            sx, cx = start.x(), current.x()
+            sy, cy = start.y(), current.y()
+            x1 = sx if sx < cx else cx
+            y1 = sy if sy < cy else cy
+            self.image_label.set_selection(
+                QRect(x1, y1, sx + cx - 2 * x1, sy + cy - 2 * y1))
+        else:
+            self.image_label.set_selection(None)
 
     def get_crop_rect(self):
         """Return the selected crop rectangle in PDF coordinates (fitz.Rect)."""
@@ -781,10 +894,97 @@ class CropPreviewDialog(QDialog):
 # =========================================================
 # BACKGROUND TASK
 # =========================================================
+def _unspool(spool):
+    """Yield the objects pickled into spool, from its start."""
+    spool.seek(0)
+    while True:
+        try:
+            yield pickle.load(spool)
+        except EOFError:
+            return
+
+
+class _LayerOutput:
+    """A vector file that the pages of one PDF are appended to."""
+
+    # whether the constructor used before QGIS 3.10 takes an encoding argument
+    legacy_encoding = True
+
+    def __init__(self, path, fields, wkb_type, crs, driver,
+                 transform_context, layer_name=None, new_file=True):
+        # copies of a template share its field definitions (implicit
+        # sharing) instead of rebuilding them from fields for every feature
+        self.template = QgsFeature(fields)
+        self.buf = []
+        self.next_id = 0
+        self.path = path
+        self.writer = self._create_writer(path, fields, wkb_type, crs, driver,
+                                          transform_context, layer_name, new_file)
+        # a writer that could not open its file reports it here, not by raising
+        if self.writer.errorMessage():
+            raise OSError(f"Cannot write {path}: {self.writer.errorMessage()}")
+
+    @staticmethod
+    def _create_writer(path, fields, wkb_type, crs, driver,
+                       transform_context, layer_name, new_file):
+        if WRITER_CREATE is not None:
+            options = QgsVectorFileWriter.SaveVectorOptions()
+            options.driverName = driver
+            options.fileEncoding = "UTF-8"
+            if layer_name:
+                options.layerName = layer_name
+            # further layers are added to the file the first one created
+            options.actionOnExistingFile = (
+                CREATE_OR_OVERWRITE_FILE if new_file else CREATE_OR_OVERWRITE_LAYER)
+            return WRITER_CREATE(path, fields, wkb_type, crs,
+                                 transform_context, options)
+        # create writer compatible with different QGIS versions; the
+        # constructor that worked is remembered for the following files
+        if _LayerOutput.legacy_encoding:
+            try:
+                return QgsVectorFileWriter(
+                    path, "UTF-8", fields, wkb_type, crs, driver)
+            except TypeError:
+                _LayerOutput.legacy_encoding = False
+        return QgsVectorFileWriter(path, fields, wkb_type, crs, driver)
+
+    def new_feature(self, attributes):
+        """A feature with the given attributes; "id" is set by add()."""
+        feat = QgsFeature(self.template)
+        feat.setAttributes([None] + attributes)
+        return feat
+
+    def add(self, feat):
+        # "id" is the first field of every layer the task writes
+        feat.setAttribute(0, self.next_id)
+        self.next_id += 1
+        self.buf.append(feat)
+        if len(self.buf) >= WRITE_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Write buffered features in one call, skipping per-feature bookkeeping."""
+        if self.buf:
+            if not self.writer.addFeatures(self.buf, FAST_INSERT):
+                # the batch is lost; say so instead of dropping it silently
+                QgsMessageLog.logMessage(
+                    f"Writing {len(self.buf)} features to {self.path} failed: "
+                    f"{self.writer.errorMessage()}", "PDF2Vector", Qgis.Warning)
+            self.buf.clear()
+
+    def close(self):
+        self.flush()
+        # deleting the writer finalizes the file
+        del self.writer
+
+
 class PdfToVectorTask(QgsTask):
+    # (success, message), emitted from finished() once the outputs are loaded
+    conversionFinished = pyqtSignal(bool, str)
+
     def __init__(self, pdf_paths, out_dir, out_fmt, crs, canvas_extent,
                  page_from, page_to, include_geom, include_text,
-                 load_outputs, crop_rect=None, dialog_ref=None,
+                 load_outputs, crop_rect=None,
                  min_size=0.0, skip_curves=False):
 
         super().__init__("PDF → Vector Conversion", QgsTask.CanCancel)
@@ -800,18 +1000,47 @@ class PdfToVectorTask(QgsTask):
         self.include_text = include_text
         self.load_outputs = load_outputs
         self.crop_rect = crop_rect  # fitz.Rect or None
-        self.dialog_ref = dialog_ref
         self.min_size = min_size
         self.skip_curves = skip_curves
+        # the size filter runs later, in place_shapes()
+        self.item_points = item_points_func(0.0, skip_curves)
+        # set by cancel(); map_pages() passes it on to the pool processes
+        self.stop = threading.Event()
+        # read here, in the main thread, for the writers created in run()
+        self.transform_context = QgsProject.instance().transformContext()
+
+        # field layouts shared by every file the task writes
+        self.geom_fields = QgsFields()
+        self.geom_fields.append(QgsField("id", QVariant.Int))
+        self.geom_fields.append(QgsField("page", QVariant.Int))
+        self.geom_fields.append(QgsField("type", QVariant.String))
+        self.text_fields = QgsFields()
+        self.text_fields.append(QgsField("id", QVariant.Int))
+        self.text_fields.append(QgsField("page", QVariant.Int))
+        self.text_fields.append(QgsField("text", QVariant.String))
+        self.text_fields.append(QgsField("size", QVariant.Double))
+        self.text_fields.append(QgsField("font", QVariant.String))
 
         self.generated = []
         self.error = None
 
+    def cancel(self):
+        # pool processes stop at their next page, not at the end of the
+        # run of pages they were handed
+        self.stop.set()
+        super().cancel()
+
     def run(self):
         """Runs in background thread processing multiple files."""
+        try:
+            import fitz  # PyMuPDF
+        except ImportError:
+            self.error = "PyMuPDF (fitz) is not installed"
+            return False
+
+        files_to_process = []
         try:
             total_progress_steps = 0
-            files_to_process = []
 
             # 1. Pre-calculate total work for progress bar
             for pdf_path in self.pdf_paths:
@@ -819,94 +1048,182 @@ class PdfToVectorTask(QgsTask):
                     return False
                 try:
                     doc = fitz.open(pdf_path)
-                    page_count = len(doc)
+                    page_count = doc.page_count
                     files_to_process.append((pdf_path, doc, page_count))
 
                     start = max(1, self.page_from)
                     end = min(page_count, self.page_to)
                     cnt = max(0, end - start + 1)
                     total_progress_steps += cnt
-                except:
+                except (OSError, RuntimeError) as e:
+                    # missing, unreadable or damaged PDF; the others still run
+                    QgsMessageLog.logMessage(
+                        f"Skipping {pdf_path}: {e}", "PDF2Vector", Qgis.Warning)
                     continue
 
             if total_progress_steps == 0:
                 total_progress_steps = 1
 
             processed_steps = 0
+            last_percent = -1
             os.makedirs(self.out_dir, exist_ok=True)
 
-            # 2. Process each file
+            # Determine extensions and driver, once for every file and page
+            is_dxf = self.out_fmt == "dxf"
+            if self.out_fmt == "shp":
+                geom_ext, text_ext = ".shp", ".shp"
+                driver = "ESRI Shapefile"
+            elif self.out_fmt == "geojson":
+                geom_ext, text_ext = ".geojson", ".geojson"
+                driver = "GeoJSON"
+            else:
+                # GeoPackage, also used for pages whose DXF export fails
+                geom_ext, text_ext = ".gpkg", ".gpkg"
+                driver = "GPKG"
+            # geometry and text go into one GeoPackage as two layers
+            # (needs QgsVectorFileWriter.create, QGIS >= 3.10)
+            shared_file = driver == "GPKG" and WRITER_CREATE is not None
+            # Two writers updating one GeoPackage at once would contend for
+            # its SQLite write lock, so its text layer is written once the
+            # geometry layer is complete. The text waits in a spool that
+            # moves to a temporary file past TEXT_SPOOL_SIZE, so a long PDF
+            # does not keep every page's spans in memory.
+            defer_text = shared_file and self.include_geom and self.include_text
+
+            # Pages are converted in a pool of worker processes, which only
+            # get picklable arguments; the QGIS layer writing stays here
+            python_exe = python_executable()
+            crop = tuple(self.crop_rect) if self.crop_rect else None
+
+            # 2. Queue the pages of every file in one pool run, so a batch
+            # of short PDFs is spread over the pool as well, and the pool
+            # is started once rather than per file
+            tasks = []
+            page_counts = []  # number of tasks of each file, in order
             for pdf_path, doc, total_pages in files_to_process:
                 base = os.path.splitext(os.path.basename(pdf_path))[0]
+                # per-page DXF files are <page_prefix><page number>.dxf
+                page_prefix = os.path.join(self.out_dir, f"{base}_p")
 
                 start = max(1, self.page_from)
                 end = min(total_pages, self.page_to)
+                pages = range(start - 1, end)
+
+                # DXF Export
+                if is_dxf:
+                    # ASCII DXF as the dialog always wrote; curves are
+                    # flattened, see flatten_cubic()
+                    tasks.extend((pdf_path, i, f"{page_prefix}{i + 1}.dxf",
+                                  self.min_size, self.skip_curves, True, MIN_CURVE_SEGMENTS,
+                                  crop, False,
+                                  self.include_geom, self.include_text)
+                                 for i in pages)
+                # SHP/GeoJSON Export
+                else:
+                    tasks.extend((pdf_path, i, crop, self.include_geom, self.include_text,
+                                  self.min_size)
+                                 for i in pages)
+                page_counts.append(len(pages))
+
+            # results arrive in task order; each file takes its own count.
+            # Without a pool, the pages reuse the documents opened above
+            all_results = iter(map_pages(
+                dxf_page_worker if is_dxf else extract_page_worker, tasks,
+                python_exe, self.isCanceled,
+                {pdf_path: doc for pdf_path, doc, _ in files_to_process},
+                self.stop))
+
+            # 3. Write each file's outputs
+            for (pdf_path, doc, total_pages), count in zip(files_to_process, page_counts):
+                base = os.path.splitext(os.path.basename(pdf_path))[0]
+                page_prefix = os.path.join(self.out_dir, f"{base}_p")
+                results = islice(all_results, count)
+
+                # Output paths; all pages of a PDF go into one file per
+                # layer type, told apart by their "page" attribute
+                if shared_file:
+                    geom_path = text_path = os.path.join(
+                        self.out_dir, f"{base}{geom_ext}")
+                else:
+                    geom_path = os.path.join(
+                        self.out_dir, f"{base}_geom{geom_ext}")
+                    text_path = os.path.join(
+                        self.out_dir, f"{base}_text{text_ext}")
+                # opened with the first page that has data for them
+                geom_out = text_out = None
+                text_spool = None  # pickled (page number, text data), see defer_text
 
-                for i in range(start - 1, end):
-                    if self.isCanceled():
-                        doc.close()
-                        return False
-
+                for result in results:
+                    i = result[0]
                     page_num = i + 1
-                    page = doc[i]
-
-                    # Determine extensions and driver
-                    if self.out_fmt == "shp":
-                        geom_ext, text_ext = ".shp", ".shp"
-                        driver = "ESRI Shapefile"
-                    elif self.out_fmt == "geojson":
-                        geom_ext, text_ext = ".geojson", ".geojson"
-                        driver = "GeoJSON"
-                    else:
-                        geom_ext, text_ext = ".geojson", ".geojson"
-                        driver = "GeoJSON"
 
-                    # Output paths
-                    geom_path = os.path.join(
-                        self.out_dir, f"{base}_p{page_num}_geom{geom_ext}")
-                    text_path = os.path.join(
-                        self.out_dir, f"{base}_p{page_num}_text{text_ext}")
-
-                    # DXF Export
-                    if self.out_fmt == "dxf":
-                        dxf_out = os.path.join(
-                            self.out_dir, f"{base}_p{page_num}.dxf")
-                        ok, msg = convert_pdf_page_to_dxf_direct(
-                            page, dxf_out, self.crop_rect,
-                            min_size=self.min_size, skip_curves=self.skip_curves)
+                    if is_dxf:
+                        _, ok, msg = result
                         if ok:
+                            dxf_out = f"{page_prefix}{page_num}.dxf"
                             self.generated.append(
                                 (dxf_out, f"{base} Page {page_num}", "dxf"))
+                            page_data = None
                         else:
-                            QgsApplication.logMessage(
-                                f"ezdxf fail for {base} p{page}: {msg}", "PDF2Vector", Qgis.Warning)
-                            if self.include_geom:
-                                self._write_geometry(page, geom_path, driver)
-                                self.generated.append(
-                                    (geom_path, f"{base} Page {page_num} Geometry", "geom"))
-
-                            if self.include_text:
-                                self._write_text(page, text_path, driver)
-                                self.generated.append(
-                                    (text_path, f"{base} Page {page_num} Text", "text"))
-                    # SHP/GeoJSON Export
+                            QgsMessageLog.logMessage(
+                                f"ezdxf fail for {base} p{page_num}: {msg}", "PDF2Vector", Qgis.Warning)
+                            page_data = extract_page(
+                                doc[i], crop, self.include_geom, self.include_text,
+                                self.min_size)
                     else:
-                        if self.include_geom:
-                            self._write_geometry(page, geom_path, driver)
-                            self.generated.append(
-                                (geom_path, f"{base} Page {page_num} Geometry", "geom"))
-                        if self.include_text:
-                            self._write_text(page, text_path, driver)
-                            self.generated.append(
-                                (text_path, f"{base} Page {page_num} Text", "text"))
-
-                    # Update progress
+                        page_data = result[1]
+
+                    if page_data is not None:
+                        if self.include_geom and geom_out is None:
+                            geom_out = self._geometry_output(
+                                geom_path, driver)
+                        if defer_text:
+                            if text_spool is None:
+                                text_spool = tempfile.SpooledTemporaryFile(TEXT_SPOOL_SIZE)
+                            pickle.dump((page_num, {
+                                "width": page_data["width"],
+                                "height": page_data["height"],
+                                "spans": page_data["spans"]}), text_spool, pickle.HIGHEST_PROTOCOL)
+                        elif self.include_text and text_out is None:
+                            text_out = self._text_output(
+                                text_path, driver, new_file=not shared_file or geom_out is None)
+                        self._write_page(page_data, page_num, geom_out, text_out)
+
+                    # Update progress; only whole-percent changes are
+                    # worth a queued update of the dialog
                     processed_steps += 1
                     percent = int(
                         (processed_steps / total_progress_steps) * 100)
-                    self.setProgress(percent)
+                    if percent != last_percent:
+                        self.setProgress(percent)
+                        last_percent = percent
 
                 doc.close()
+                # drop the fonts and images MuPDF kept for this file, so a
+                # long batch does not hold every PDF's resources at once
+                fitz.TOOLS.store_shrink(100)
+                # the files are complete once their writers are closed
+                if geom_out is not None:
+                    geom_out.close()
+                    if shared_file:
+                        geom_path += "|layername=geometry"
+                    self.generated.append(
+                        (geom_path, f"{base} Geometry", "geom"))
+                if text_spool is not None:
+                    if not self.isCanceled():
+                        text_out = self._text_output(
+                            text_path, driver, new_file=geom_out is None)
+                        for page_num, page_data in _unspool(text_spool):
+                            self._write_text(page_data, page_num, text_out)
+                    text_spool.close()
+                if text_out is not None:
+                    text_out.close()
+                    if shared_file:
+                        text_path += "|layername=text"
+                    self.generated.append(
+                        (text_path, f"{base} Text", "text"))
+                if self.isCanceled():
+                    return False
 
             return True
 
@@ -914,234 +1231,118 @@ class PdfToVectorTask(QgsTask):
             self.error = e
             traceback.print_exc()
             return False
+        finally:
+            # documents left open by a cancel or an error; the others
+            # were closed as soon as their file was written
+            for _, doc, _ in files_to_process:
+                if not doc.is_closed:
+                    doc.close()
+
+    def _write_page(self, page_data, page_num, geom_out, text_out):
+        """Append one page to the open outputs, one after the other."""
+        # each writer stays on the task thread that created it; OGR
+        # datasets are not meant to be driven from other threads
+        if geom_out is not None:
+            self._write_geometry(page_data, page_num, geom_out)
+        if text_out is not None:
+            self._write_text(page_data, page_num, text_out)
 
     # -----------------------------------------------
     # GEOMETRY WRITER
     # -----------------------------------------------
 
-    def _write_geometry(self, page, out_path, driver):
-        fields = QgsFields()
-        fields.append(QgsField("id", QVariant.Int))
-        fields.append(QgsField("type", QVariant.String))
-
-        page_w = float(page.rect.width)
-        page_h = float(page.rect.height)
+    def _geometry_output(self, out_path, driver):
+        return _LayerOutput(out_path, self.geom_fields, QgsWkbTypes.LineString,
+                            self.crs, driver, self.transform_context,
+                            layer_name="geometry" if driver == "GPKG" else None)
 
+    def _page_offset(self, page_data):
         ox, oy = 0.0, 0.0
         if self.canvas_extent and not self.canvas_extent.isEmpty():
-            ox = self.canvas_extent.center().x() - page_w / 2
-            oy = self.canvas_extent.center().y() - page_h / 2
-
-        # create writer compatible with different QGIS versions
-        try:
-            writer = QgsVectorFileWriter(
-                out_path, "UTF-8", fields,
-                QgsWkbTypes.LineString, self.crs, driver)
-        except:
-            writer = QgsVectorFileWriter(out_path, fields,
-                                         QgsWkbTypes.LineString,
-                                         self.crs, driver)
-
-        drawings = page.get_drawings() or []
-        fid = 0
-        for d in drawings:
-            # Check if drawing intersects with crop region (not full containment)
-            if self.crop_rect:
-                d_rect = d.get("rect")
-                if d_rect:
-                    # Check if drawing intersects the crop region
-                    if not (d_rect.x0 <= self.crop_rect.x1 and d_rect.x1 >= self.crop_rect.x0 and
-                            d_rect.y0 <= self.crop_rect.y1 and d_rect.y1 >= self.crop_rect.y0):
-                        continue  # Skip drawings that don't intersect crop region
-
-            for item in d.get("items", []):
-                try:
-                    cmd = item[0]
-                    if isinstance(cmd, bytes):
-                        cmd = cmd.decode("utf-8", "ignore")
-
-                    # Check size for filtering logic
-                    pass_size_check = True
-                    if self.min_size > 0:
-                        bbox_w = 0.0
-                        bbox_h = 0.0
-                        if str(cmd).lower() == "l":
-                            p1, p2 = item[1], item[2]
-                            bbox_w = abs(p1[0] - p2[0])
-                            bbox_h = abs(p1[1] - p2[1])
-                        elif str(cmd).lower() == "c":
-                            xs = [pt[0] for pt in item[1:] if pt]
-                            ys = [pt[1] for pt in item[1:] if pt]
-                            if xs and ys:
-                                bbox_w = max(xs) - min(xs)
-                                bbox_h = max(ys) - min(ys)
-                        elif str(cmd).lower() in ("re", "rect"):
-                            rect = item[1]
-                            bbox_w = rect.width
-                            bbox_h = rect.height
-
-                        if max(bbox_w, bbox_h) < self.min_size:
-                            pass_size_check = False
-
-                    if not pass_size_check:
-                        continue
-
-                    feat = QgsFeature(fields)
-                    feat.setAttribute("id", fid)
-
-                    # LINE
-                    if str(cmd).lower() == "l":
-                        p1 = item[1]
-                        p2 = item[2]
-
-                        # Apply clipping if crop region is set
-                        if self.crop_rect:
-                            clipped = clip_line_to_rect(
-                                p1[0], p1[1], p2[0], p2[1], self.crop_rect)
-                            if clipped is None:
-                                continue  # Line is completely outside crop region
-
-                            x1, y1, x2, y2 = clipped
-                            x1, y1 = x1 + ox, page_h - y1 + oy
-                            x2, y2 = x2 + ox, page_h - y2 + oy
-                        else:
-                            x1, y1 = p1[0] + ox, page_h - p1[1] + oy
-                            x2, y2 = p2[0] + ox, page_h - p2[1] + oy
-
-                        geom = QgsGeometry.fromPolylineXY([
-                            QgsPointXY(x1, y1),
-                            QgsPointXY(x2, y2)
-                        ])
-                        feat.setGeometry(geom)
-                        feat.setAttribute("type", "line")
-                        writer.addFeature(feat)
-                        fid += 1
-
-                    # CURVE (write polyline through control points)
-                    elif str(cmd).lower() == "c":
-                        if self.skip_curves:
-                            continue
-
-                        # For curves, check if all points are within crop region
-                        all_inside = True
-                        if self.crop_rect:
-                            for cpt in item[1:]:
-                                if not (self.crop_rect.x0 <= cpt[0] <= self.crop_rect.x1 and
-                                        self.crop_rect.y0 <= cpt[1] <= self.crop_rect.y1):
-                                    all_inside = False
-                                    break
-
-                        if not all_inside and self.crop_rect:
-                            continue  # Skip curves that extend outside crop region
-
-                        pts = []
-                        for cpt in item[1:]:
-                            px = cpt[0] + ox
-                            py = page_h - cpt[1] + oy
-                            pts.append(QgsPointXY(px, py))
-                        if len(pts) >= 2:
-                            geom = QgsGeometry.fromPolylineXY(pts)
-                            feat.setGeometry(geom)
-                            feat.setAttribute("type", "curve")
-                            writer.addFeature(feat)
-                            fid += 1
-
-                    # RECTANGLE
-                    elif str(cmd).lower() in ("re", "rect"):
-                        rect = item[1]
-
-                        if self.crop_rect:
-                            # For rectangles, check if fully contained within crop
-                            if not (rect.x0 >= self.crop_rect.x0 and rect.x1 <= self.crop_rect.x1 and
-                                    rect.y0 >= self.crop_rect.y0 and rect.y1 <= self.crop_rect.y1):
-                                continue  # Skip rectangles not fully within crop
-
-                        x0, y0 = rect.x0, rect.y0
-                        x1, y1 = rect.x1, rect.y1
-
-                        pts = [
-                            QgsPointXY(x0 + ox, page_h - y0 + oy),
-                            QgsPointXY(x1 + ox, page_h - y0 + oy),
-                            QgsPointXY(x1 + ox, page_h - y1 + oy),
-                            QgsPointXY(x0 + ox, page_h - y1 + oy),
-                            QgsPointXY(x0 + ox, page_h - y0 + oy)
-                        ]
-                        geom = QgsGeometry.fromPolylineXY(pts)
-                        feat.setGeometry(geom)
-                        feat.setAttribute("type", "rect")
-                        writer.addFeature(feat)
-                        fid += 1
-
-                except Exception:
-                    continue
-
-        del writer
+            ox = self.canvas_extent.center().x() - float(page_data["width"]) / 2
+            oy = self.canvas_extent.center().y() - float(page_data["height"]) / 2
+        return ox, oy
+
+    def _write_geometry(self, page_data, page_num, out):
+        """Append the drawing items of extract_page() data as line features."""
+        page_h = float(page_data["height"])
+        ox, oy = self._page_offset(page_data)
+
+        coords = []  # (x, y) of every kept item, in PDF page coordinates
+        shapes = []  # (type, start, end) slice of coords per feature
+        # loop-invariant lookups bound to locals once per page
+        item_points = self.item_points
+        extend_coords = coords.extend
+        add_shape = shapes.append
+        # items are plain tuples already fitted to the crop region
+        for item in page_data["items"]:
+            shape = item_points(item)
+            if shape is None:
+                continue
+            gtype, pts = shape
+            if gtype == "rectangle":
+                gtype = "rect"
+                pts = pts + pts[:1]
+            elif gtype not in ("line", "curve"):
+                continue  # only lines, curves and rectangles are written
+
+            # Points stay in PDF space here; they are moved to the
+            # canvas all at once below
+            start = len(coords)
+            extend_coords(pts)  # already (x, y) pairs, see item_points_func()
+            add_shape((gtype, start, len(coords)))
+
+        # size filter and transform, compiled with numba if it is installed
+        shapes, xs, ys = place_shapes(
+            coords, shapes, page_h, ox, oy, self.min_size)
+        is_canceled = self.isCanceled
+        new_feature = out.new_feature
+        add = out.add
+        for n, (gtype, start, end) in enumerate(shapes):
+            # a dense page can take a while; stop at the next batch
+            if n % WRITE_BATCH_SIZE == 0 and is_canceled():
+                return
+            try:
+                feat = new_feature([page_num, gtype])
+                # straight from coordinate lists, no QgsPointXY per vertex
+                feat.setGeometry(QgsGeometry(
+                    QgsLineString(xs[start:end], ys[start:end])))
+                add(feat)
+            except Exception:
+                continue
 
     # -----------------------------------------------
     # TEXT WRITER
     # -----------------------------------------------
 
-    def _write_text(self, page, out_path, driver):
-        fields = QgsFields()
-        fields.append(QgsField("id", QVariant.Int))
-        fields.append(QgsField("text", QVariant.String))
-        fields.append(QgsField("size", QVariant.Double))
-        fields.append(QgsField("font", QVariant.String))
-
-        page_h = float(page.rect.height)
-
-        try:
-            writer = QgsVectorFileWriter(
-                out_path, "UTF-8", fields,
-                QgsWkbTypes.Point, self.crs, driver)
-        except:
-            writer = QgsVectorFileWriter(out_path, fields,
-                                         QgsWkbTypes.Point,
-                                         self.crs, driver)
-
-        ox = oy = 0.0
-        page_w = float(page.rect.width)
-        if self.canvas_extent and not self.canvas_extent.isEmpty():
-            ox = self.canvas_extent.center().x() - page_w / 2
-            oy = self.canvas_extent.center().y() - page_h / 2
-
-        try:
-            if self.crop_rect:
-                # Use clip parameter to extract only text in crop region
-                info = page.get_text("dict", clip=self.crop_rect)
-            else:
-                info = page.get_text("dict")
-        except Exception:
-            info = {}
-
-        fid = 0
-        for block in info.get("blocks", []):
-            if block.get("type") != 0:
+    def _text_output(self, out_path, driver, new_file=True):
+        return _LayerOutput(out_path, self.text_fields, QgsWkbTypes.Point,
+                            self.crs, driver, self.transform_context,
+                            layer_name="text" if driver == "GPKG" else None,
+                            new_file=new_file)
+
+    def _write_text(self, page_data, page_num, out):
+        """Append the text spans of extract_page() data as point features."""
+        page_h = float(page_data["height"])
+        ox, oy = self._page_offset(page_data)
+
+        is_canceled = self.isCanceled
+        new_feature = out.new_feature
+        add = out.add
+        # spans were already limited to the crop region
+        for n, (txt, size, font, (oxg, oyg)) in enumerate(page_data["spans"]):
+            if n % WRITE_BATCH_SIZE == 0 and is_canceled():
+                return
+            try:
+                x = oxg + ox
+                y = page_h - oyg + oy
+                feat = new_feature([page_num, txt.strip(), size, font])
+                # the QgsPoint is handed to the geometry as is, where
+                # fromPointXY() would convert a QgsPointXY into a new one
+                feat.setGeometry(QgsGeometry(QgsPoint(x, y)))
+                add(feat)
+            except Exception:
                 continue
-            for line in block.get("lines", []):
-                for span in line.get("spans", []):
-                    try:
-                        txt = span.get("text", "").strip()
-                        if not txt:
-                            continue
-                        oxg, oyg = span.get("origin", (None, None))
-                        if oxg is None:
-                            continue
-                        x = oxg + ox
-                        y = page_h - oyg + oy
-                        feat = QgsFeature(fields)
-                        feat.setAttribute("id", fid)
-                        feat.setAttribute("text", txt)
-                        feat.setAttribute("size", float(span.get("size", 0.0)))
-                        feat.setAttribute("font", span.get("font", "Unknown"))
-                        feat.setGeometry(
-                            QgsGeometry.fromPointXY(QgsPointXY(x, y)))
-                        writer.addFeature(feat)
-                        fid += 1
-                    except Exception:
-                        continue
-
-        del writer
 
     # -----------------------------------------------
     # TASK FINISHED (MAIN THREAD)
@@ -1151,8 +1352,7 @@ class PdfToVectorTask(QgsTask):
         """Called in MAIN thread."""
         if self.error:
             iface.messageBar().pushCritical("PDF→Vector", str(self.error))
-            if self.dialog_ref:
-                self.dialog_ref.on_task_finished(False, str(self.error))
+            self.conversionFinished.emit(False, str(self.error))
             return
 
         loaded = 0
@@ -1171,30 +1371,35 @@ class PdfToVectorTask(QgsTask):
             root = prj.layerTreeRoot()
             group = root.insertGroup(0, group_name)
 
+        layers = []
         for path, name, typ in self.generated:
-            if not os.path.exists(path):
+            # GeoPackage layers are given as "<file>|layername=<layer>"
+            if not os.path.exists(path.split("|")[0]):
                 continue
             if not self.load_outputs:
                 continue
 
             lyr = QgsVectorLayer(path, name, "ogr")
             if lyr.isValid():
-                # Add without showing in legend yet
-                prj.addMapLayer(lyr, False)
-
-                if group:
-                    group.addLayer(lyr)
-                else:
-                    # If only one layer, add normally
+                layers.append(lyr)
+
+        if layers:
+            # Register all layers in one call, without showing them in the
+            # legend yet, then add their tree nodes in one call too
+            prj.addMapLayers(layers, False)
+            if group:
+                group.insertChildNodes(
+                    -1, [QgsLayerTreeLayer(lyr) for lyr in layers])
+            else:
+                # If only one layer, add normally
+                for lyr in layers:
                     prj.layerTreeRoot().addLayer(lyr)
-
-                loaded += 1
+            loaded = len(layers)
 
         iface.messageBar().pushSuccess("PDF→Vector",
                                        f"Conversion completed. {loaded} layers loaded.")
 
-        if self.dialog_ref:
-            self.dialog_ref.on_task_finished(True, f"{loaded} layers loaded.")
+        self.conversionFinished.emit(True, f"{loaded} layers loaded.")
 
 
 # =========================================================
@@ -1207,10 +1412,11 @@ class PdfToVectorDialog(QDialog):
         self.setWindowTitle("PDF → Vector Converter")
         self.setMinimumWidth(450)
         self.task = None
-        self.task_timer = QTimer()
-        self.task_timer.setInterval(300)
-        self.task_timer.timeout.connect(self._update_progress_safe)
         self.crop_rect = None  # Stores the crop region (fitz.Rect or None)
+        # first selected PDF, kept open between _pick_pdf() and start(),
+        # and the (path, mtime, size) it was opened as
+        self._cached_doc = None
+        self._cached_key = None
 
         self._build_ui()
 
@@ -1233,13 +1439,11 @@ class PdfToVectorDialog(QDialog):
         if self.task:
             try:
                 self.task.cancel()
-            except:
-                pass
+            except RuntimeError:
+                pass  # the task manager already deleted the finished task
             self.task = None
 
-        # Stop the progress timer
-        if self.task_timer:
-            self.task_timer.stop()
+        self._close_cached_doc()
 
         # Accept the close event
         super().closeEvent(event)
@@ -1309,8 +1513,9 @@ class PdfToVectorDialog(QDialog):
         grp_io_layout.addSpacing(4)
         grp_io_layout.addWidget(QLabel("Output Format:"))
         self.format_combo = QComboBox()
+        # GeoPackage first: one file per PDF instead of a .shp/.shx/.dbf/.prj set
         self.format_combo.addItems(
-            ["Shapefile (.shp)", "GeoJSON (.geojson)", "DXF (.dxf)"])
+            ["GeoPackage (.gpkg)", "Shapefile (.shp)", "GeoJSON (.geojson)", "DXF (.dxf)"])
         grp_io_layout.addWidget(self.format_combo)
 
         grp_io.setLayout(grp_io_layout)
@@ -1542,17 +1747,44 @@ class PdfToVectorDialog(QDialog):
                     if hasattr(self, 'lbl_crop_status'):
                         self.lbl_crop_status.setText("Crop: Full Page")
 
-                # Use the first file to set page counts
-                try:
-                    if len(files) > 0:
-                        doc = fitz.open(files[0])
-                        n = len(doc)
-                        self.spin_from.setMaximum(n)
-                        self.spin_to.setMaximum(n)
-                        self.spin_to.setValue(n)
-                        doc.close()
-                except:
-                    pass
+                # Use the first file to set page counts, once the file
+                # dialog has gone; opening a large or remote PDF can take a while
+                first = files[0]
+                QTimer.singleShot(0, lambda: self._probe_page_count(first))
+
+    def _probe_page_count(self, path):
+        """Set the page range limits from path, unless the selection moved on."""
+        if self.pdf_edit.text().split(";")[0].strip() != path:
+            return
+        try:
+            n = self._open_cached_doc(path).page_count
+        except (OSError, RuntimeError) as e:
+            # PyMuPDF's open errors are RuntimeErrors; the range stays as it was
+            QgsMessageLog.logMessage(str(e), "PDF2Vector", Qgis.Warning)
+            return
+        self.spin_from.setMaximum(n)
+        self.spin_to.setMaximum(n)
+        self.spin_to.setValue(n)
+
+    def _open_cached_doc(self, path):
+        """
+        Return the open document of path, reopening only if the path changed
+        or the file was rewritten since (a new mtime or size).
+        """
+        st = os.stat(path)
+        key = (path, st.st_mtime_ns, st.st_size)
+        if self._cached_doc is None or self._cached_key != key:
+            import fitz
+            self._close_cached_doc()
+            self._cached_doc = fitz.open(path)
+            self._cached_key = key
+        return self._cached_doc
+
+    def _close_cached_doc(self):
+        if self._cached_doc is not None:
+            self._cached_doc.close()
+        self._cached_doc = None
+        self._cached_key = None
 
     def _pick_out(self):
         # Qt5/Qt6 compatible directory dialog
@@ -1645,9 +1877,7 @@ class PdfToVectorDialog(QDialog):
 
         # Check first file for page count
         try:
-            doc = fitz.open(pdf_files[0])
-            first_pages = len(doc)
-            doc.close()
+            first_pages = self._open_cached_doc(pdf_files[0]).page_count
         except Exception as e:
             QMessageBox.warning(self, "Error opening PDF", str(e))
             return
@@ -1674,7 +1904,7 @@ class PdfToVectorDialog(QDialog):
             return
 
         fmt_i = self.format_combo.currentIndex()
-        out_fmt = "shp" if fmt_i == 0 else ("geojson" if fmt_i == 1 else "dxf")
+        out_fmt = ["gpkg", "shp", "geojson", "dxf"][fmt_i]
 
         # disable UI
         self.btn_convert.setEnabled(False)
@@ -1686,8 +1916,8 @@ class PdfToVectorDialog(QDialog):
 
         try:
             cext = iface.mapCanvas().extent()
-        except:
-            cext = None
+        except (AttributeError, RuntimeError):
+            cext = None  # no canvas to place the output on
 
         self.task = PdfToVectorTask(
             pdf_files, out, out_fmt, crs, cext,
@@ -1696,15 +1926,23 @@ class PdfToVectorDialog(QDialog):
             include_text=self.chk_text.isChecked(),
             load_outputs=self.chk_load.isChecked(),
             crop_rect=self.crop_rect,
-            dialog_ref=self,
             min_size=self.spin_min_size.value(),
             skip_curves=self.chk_skip_curves.isChecked()
         )
+        # setProgress() is called from the worker thread; queue the updates
+        # onto the GUI thread instead of polling the task on a timer.
+        # The end of the task is queued as well, so the task never calls
+        # into the dialog directly.
+        try:
+            queued = Qt.ConnectionType.QueuedConnection  # Qt6
+        except AttributeError:
+            queued = Qt.QueuedConnection  # Qt5
+        self.task.progressChanged.connect(self._on_progress, queued)
+        self.task.conversionFinished.connect(self.on_task_finished, queued)
         QgsApplication.taskManager().addTask(self.task)
 
         self.progress.setValue(0)
         self.lbl_prog.setText("0%")
-        self.task_timer.start()
 
     def _cancel(self):
         """Cancel the running task."""
@@ -1712,50 +1950,22 @@ class PdfToVectorDialog(QDialog):
             self.task.cancel()
         self.lbl_prog.setText("Cancelling...")
 
-    def _update_progress_safe(self):
-        """Safely update progress without touching deleted QObject."""
+    def _on_progress(self, progress):
+        """Show the progress reported by the running task."""
         if self.task is None:
-            self.task_timer.stop()
-            return
-
-        # Safe status poll
-        try:
-            status = self.task.status()
-        except RuntimeError:
-            # Task is already deleted
-            self.task = None
-            self.task_timer.stop()
-            return
-
-        # If task finished or terminated, stop timer
-        # Qt5/Qt6 compatible task status check
-        try:
-            # Qt6 style
-            if status in (QgsTask.TaskStatus.Complete, QgsTask.TaskStatus.Terminated):
-                self.task_timer.stop()
-                return
-        except AttributeError:
-            # Qt5 style
-            if status in (QgsTask.Complete, QgsTask.Terminated):
-                self.task_timer.stop()
-                return
-
-        # Safe reading of progress
-        try:
-            prog = int(self.task.progress())
-            self.progress.setValue(prog)
-            self.lbl_prog.setText(f"{prog}%")
-        except RuntimeError:
-            self.task = None
-            self.task_timer.stop()
+            # a queued update arriving after on_task_finished()
             return
+        prog = int(progress)
+        self.progress.setValue(prog)
+        self.lbl_prog.setText(f"{prog}%")
 
     # ----------------------------------------------------
-    # TASK FINISHED (called by thread in main thread)
+    # TASK FINISHED (queued from PdfToVectorTask.conversionFinished)
     # ----------------------------------------------------
     def on_task_finished(self, success, message=""):
-        self.task_timer.stop()
         self.task = None
+        # the PDF may be edited or replaced before the next run
+        self._close_cached_doc()
 
         if success:
             self.progress.setValue(100)
@@ -1,45 +1,92 @@
+import argparse
+import json
+import subprocess
 import fitz
 import sys
 
-def inspect_pdf(pdf_path):
-    print(f"Inspecting {pdf_path}...")
+def collect_report(pdf_path):
+    """Gather per-page text/drawing statistics into a plain dict."""
+    report = {"path": pdf_path, "pages": []}
     try:
         doc = fitz.open(pdf_path)
     except Exception as e:
-        print(f"Error opening PDF: {e}")
-        return
+        report["error"] = f"Error opening PDF: {e}"
+        return report
 
     for i, page in enumerate(doc):
-        print(f"\n--- Page {i+1} ---")
-        
         # Check Text
         text = page.get_text("dict")
         blocks = text.get("blocks", [])
         text_blocks = [b for b in blocks if b["type"] == 0]
-        print(f"Text Blocks Found: {len(text_blocks)}")
-        
-        if len(text_blocks) > 0:
-            print("First 5 text spans:")
-            count = 0
-            for b in text_blocks:
-                for l in b["lines"]:
-                    for s in l["spans"]:
-                        print(f"  - '{s['text']}' (Font: {s['font']}, Size: {s['size']})")
-                        count += 1
-                        if count >= 5: break
-                    if count >= 5: break
-                if count >= 5: break
-        
+
+        spans = []
+        for b in text_blocks:
+            for l in b["lines"]:
+                for s in l["spans"]:
+                    spans.append({"text": s["text"], "font": s["font"], "size": s["size"]})
+                    if len(spans) >= 5: break
+                if len(spans) >= 5: break
+            if len(spans) >= 5: break
+
         # Check Drawings
         drawings = page.get_drawings()
-        print(f"Drawing Paths Found: {len(drawings)}")
-        
+
         # Check for hidden text or other modes
         raw_text = page.get_text()
-        print(f"Raw Text Content (first 100 chars): {raw_text[:100]!r}")
+
+        report["pages"].append({
+            "page": i + 1,
+            "text_blocks": len(text_blocks),
+            "first_spans": spans,
+            "drawing_paths": len(drawings),
+            "raw_text": raw_text[:100],
+        })
+
+    return report
+
+def format_report(report):
+    out = [f"Inspecting {report['path']}..."]
+    if "error" in report:
+        out.append(report["error"])
+        return "\n".join(out)
+
+    for page in report["pages"]:
+        out.append(f"\n--- Page {page['page']} ---")
+        out.append(f"Text Blocks Found: {page['text_blocks']}")
+        if page["first_spans"]:
+            out.append("First 5 text spans:")
+            for s in page["first_spans"]:
+                out.append(f"  - '{s['text']}' (Font: {s['font']}, Size: {s['size']})")
+        out.append(f"Drawing Paths Found: {page['drawing_paths']}")
+        out.append(f"Raw Text Content (first 100 chars): {page['raw_text']!r}")
+    return "\n".join(out)
+
+def inspect_pdf(pdf_path, as_json=False):
+    report = collect_report(pdf_path)
+    # Written once, either as text or as machine-readable JSON
+    if as_json:
+        sys.stdout.write(json.dumps(report, indent=2) + "\n")
+    else:
+        sys.stdout.write(format_report(report) + "\n")
+
+def report_import_times():
+    # Let CPython time the imports itself instead of probing them by hand
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import fitz; import ezdxf"],
+        capture_output=True, text=True)
+    sys.stdout.write(result.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect text and drawings in a PDF.")
+    parser.add_argument("pdf_file", nargs="?", default="sample2.pdf", help="Path to the PDF file.")
+    parser.add_argument("--json", action="store_true", help="Emit the report as JSON.")
+    parser.add_argument("--timed", action="store_true",
+                        help="Print the -X importtime table for fitz and ezdxf and exit.")
+    args = parser.parse_args()
+    if args.timed:
+        report_import_times()
+        return
+    inspect_pdf(args.pdf_file, as_json=args.json)
 
 if __name__ == "__main__":
-    pdf_file = "sample2.pdf"
-    if len(sys.argv) > 1:
-        pdf_file = sys.argv[1]
-    inspect_pdf(pdf_file)
+    main()
@@ -14,7 +14,8 @@ import os
 # Add the directory containing this script to sys.path
 # This allows you to place 'ezdxf' and 'pymupdf' (fitz) folders directly next to this script
 script_dir = os.path.dirname(os.path.abspath(__file__))
-if script_dir not in sys.path:
+# normcase so the same folder spelled differently on Windows is not added twice
+if os.path.normcase(script_dir) not in {os.path.normcase(p) for p in sys.path}:
     sys.path.insert(0, script_dir)
 
 
@@ -2,8 +2,9 @@ import argparse
 import sys
 import os
 
-# Add current directory to path so we can import converter if running directly
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Add current directory to path so we can import converter if running directly.
+# Prepend it so the import resolves there before walking the rest of sys.path.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.converter import PDF2DXFConverter
 
@@ -12,6 +13,7 @@ def main():
     parser.add_argument("input_pdf", help="Path to the input PDF file.")
     parser.add_argument("output_dxf", help="Path to the output DXF file.")
     parser.add_argument("--pages", help="Comma-separated list of page numbers to convert (0-indexed).", default=None)
+    parser.add_argument("--binary", action="store_true", help="Write binary DXF instead of ASCII DXF.")
 
     args = parser.parse_args()
 
@@ -25,7 +27,7 @@ def main():
 
     try:
         converter = PDF2DXFConverter(args.input_pdf)
-        converter.convert(args.output_dxf, pages=pages)
+        converter.convert(args.output_dxf, pages=pages, binary_dxf=args.binary)
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
@@ -3,50 +3,32 @@ import ezdxf
 from ezdxf.math import Vec3
 import os
 
-def clip_line_to_rect(x1, y1, x2, y2, rect):
-    INSIDE = 0
-    LEFT = 1
-    RIGHT = 2
-    BOTTOM = 4
-    TOP = 8
+# The plugin's worker module is qgis-free; the clipping and the layer
+# attributes of geometry entities come from there rather than a copy
+from PdfExtract.pdf_to_dxf_worker import GEOMETRY_ATTRS, clip_line_to_rect
 
-    def compute_code(x, y):
-        code = INSIDE
-        if x < rect.x0: code |= LEFT
-        elif x > rect.x1: code |= RIGHT
-        if y < rect.y0: code |= BOTTOM
-        elif y > rect.y1: code |= TOP
-        return code
+# dict extraction without image blocks: only text spans are used, and this
+# keeps MuPDF from decoding every embedded image into the result
+TEXT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
 
-    code1 = compute_code(x1, y1)
-    code2 = compute_code(x2, y2)
+# PyMuPDF 1.22+: drawings as plain tuples rather than Point/Rect objects
+HAS_CDRAWINGS = hasattr(fitz.Page, "get_cdrawings")
 
-    while True:
-        if code1 == 0 and code2 == 0:
-            return (x1, y1, x2, y2)
-        if code1 & code2:
-            return None
+def _line_extent(item):
+    return max(abs(item[1][0] - item[2][0]), abs(item[1][1] - item[2][1]))
 
-        code_out = code1 if code1 != 0 else code2
-        if code_out & TOP:
-            x = x1 + (x2 - x1) * (rect.y1 - y1) / (y2 - y1)
-            y = rect.y1
-        elif code_out & BOTTOM:
-            x = x1 + (x2 - x1) * (rect.y0 - y1) / (y2 - y1)
-            y = rect.y0
-        elif code_out & RIGHT:
-            y = y1 + (y2 - y1) * (rect.x1 - x1) / (x2 - x1)
-            x = rect.x1
-        elif code_out & LEFT:
-            y = y1 + (y2 - y1) * (rect.x0 - x1) / (x2 - x1)
-            x = rect.x0
+def _curve_extent(item):
+    xs = [pt[0] for pt in item[1:5]]
+    ys = [pt[1] for pt in item[1:5]]
+    return max(max(xs) - min(xs), max(ys) - min(ys))
 
-        if code_out == code1:
-            x1, y1 = x, y
-            code1 = compute_code(x1, y1)
-        else:
-            x2, y2 = x, y
-            code2 = compute_code(x2, y2)
+def _rect_extent(item):
+    # a fitz.Rect or, from get_cdrawings(), a plain (x0, y0, x1, y1) tuple
+    x0, y0, x1, y1 = item[1]
+    return max(abs(x1 - x0), abs(y1 - y0))
+
+# Drawing command -> larger side of the item's bounding box, for min_size
+ITEM_EXTENT = {"l": _line_extent, "c": _curve_extent, "re": _rect_extent}
 
 class PDF2DXFConverter:
     def __init__(self, pdf_path):
@@ -71,12 +53,15 @@ class PDF2DXFConverter:
         self.dxf.layers.new(name='PDF_GEOMETRY', dxfattribs={'color': 7}) # White/Black
         self.dxf.layers.new(name='PDF_TEXT', dxfattribs={'color': 1}) # Red
 
-    def convert(self, output_path, pages=None, crop_rect=None, min_size=0.0, skip_curves=False, include_geom=True, include_text=True):
+    def convert(self, output_path, pages=None, crop_rect=None, min_size=0.0, skip_curves=False, include_geom=True, include_text=True, binary_dxf=False):
         """
         Converts PDF pages to DXF.
         :param output_path: Path to save the DXF file.
         :param pages: List of page numbers to convert (0-indexed). If None, converts all.
+        :param binary_dxf: Write the smaller, faster to write binary DXF instead of ASCII DXF,
+            which older GDAL and many CAD tools cannot read.
         """
+        fmt = 'bin' if binary_dxf else 'asc'
         if not self.doc:
             self.load_pdf()
         
@@ -99,7 +84,7 @@ class PDF2DXFConverter:
                 # Construct new filename
                 # Use page_num + 1 for 1-based indexing in filename
                 page_output_path = f"{base}_page_{page_num + 1}{ext}"
-                self.dxf.saveas(page_output_path)
+                self.dxf.saveas(page_output_path, fmt=fmt)
                 if self.verbose:
                     print(f"Saved page {page_num + 1} to {page_output_path}")
         else:
@@ -109,7 +94,7 @@ class PDF2DXFConverter:
                 page_num = pages[0]
                 if page_num < len(self.doc):
                         self._convert_page(self.doc[page_num], 0, crop_rect, min_size, skip_curves, include_geom, include_text)
-            self.dxf.saveas(output_path)
+            self.dxf.saveas(output_path, fmt=fmt)
             if self.verbose:
                 print(f"DXF saved to {output_path}")
 
@@ -122,117 +107,52 @@ class PDF2DXFConverter:
 
         # 1. Extract Drawings (Vectors)
         if include_geom:
-            paths = page.get_drawings()
+            # Drawing command -> method adding it to the modelspace
+            handlers = {"l": self._add_line_item, "c": self._add_curve_item, "re": self._add_rect_item}
+            if skip_curves:
+                del handlers["c"]
+            paths = page.get_cdrawings() if HAS_CDRAWINGS else page.get_drawings()
+            if crop_rect:
+                # plain floats; fitz.Rect.intersects() is Python code and
+                # far slower than four comparisons of locals
+                cx0, cy0, cx1, cy1 = crop_rect
             for path in paths:
                 if crop_rect:
                     path_rect = path.get("rect")
                     if path_rect:
-                        if not (path_rect.x0 <= crop_rect.x1 and path_rect.x1 >= crop_rect.x0 and
-                                path_rect.y0 <= crop_rect.y1 and path_rect.y1 >= crop_rect.y0):
+                        x0, y0, x1, y1 = path_rect
+                        if not (x0 <= cx1 and x1 >= cx0 and
+                                y0 <= cy1 and y1 >= cy0):
                             continue
                 
                 for item in path["items"]:
-                    cmd = item[0]
-                    
-                    pass_size_check = True
-                    if min_size > 0:
-                        bbox_w = bbox_h = 0.0
-                        if cmd == "l":
-                            bbox_w = abs(item[1][0] - item[2][0])
-                            bbox_h = abs(item[1][1] - item[2][1])
-                        elif cmd == "c":
-                            xs = [pt[0] for pt in item[1:5]]
-                            ys = [pt[1] for pt in item[1:5]]
-                            bbox_w = max(xs) - min(xs)
-                            bbox_h = max(ys) - min(ys)
-                        elif cmd == "re":
-                            rect = item[1]
-                            bbox_w = rect.width
-                            bbox_h = rect.height
-                            
-                        if max(bbox_w, bbox_h) < min_size:
-                            pass_size_check = False
-                            
-                    if not pass_size_check:
+                    handler = handlers.get(item[0])
+                    if handler is None:
                         continue
-
-                    if cmd == "l":  # Line
-                        p1 = item[1]
-                        p2 = item[2]
-                        if crop_rect:
-                            clipped = clip_line_to_rect(p1[0], p1[1], p2[0], p2[1], crop_rect)
-                            if clipped is None:
-                                continue
-                            p1, p2 = (clipped[0], clipped[1]), (clipped[2], clipped[3])
-                        self.msp.add_line(
-                            self._transform_point(p1, x_offset, page_height),
-                            self._transform_point(p2, x_offset, page_height),
-                            dxfattribs={'layer': 'PDF_GEOMETRY'}
-                        )
-                    elif cmd == "c":  # Cubic Bezier
-                        if skip_curves:
-                            continue
-                        if crop_rect:
-                            all_inside = True
-                            for pt in item[1:5]:
-                                if not (crop_rect.x0 <= pt[0] <= crop_rect.x1 and crop_rect.y0 <= pt[1] <= crop_rect.y1):
-                                    all_inside = False
-                                    break
-                            if not all_inside:
-                                continue
-                                
-                        p1, p2, p3, p4 = item[1], item[2], item[3], item[4]
-                        control_points = [
-                            self._transform_point(p1, x_offset, page_height),
-                            self._transform_point(p2, x_offset, page_height),
-                            self._transform_point(p3, x_offset, page_height),
-                            self._transform_point(p4, x_offset, page_height)
-                        ]
-                        self.msp.add_spline(control_points, degree=3, dxfattribs={'layer': 'PDF_GEOMETRY'})
-                    elif cmd == "re": # Rectangle
-                        rect = item[1]
-                        p1 = (rect.x0, rect.y0)
-                        p2 = (rect.x1, rect.y0)
-                        p3 = (rect.x1, rect.y1)
-                        p4 = (rect.x0, rect.y1)
-                        
-                        # Convert rectangle to 4 clippable lines so crossing borders are correctly cropped
-                        lines = [(p1, p2), (p2, p3), (p3, p4), (p4, p1)]
-                        for pt1, pt2 in lines:
-                            if crop_rect:
-                                clipped = clip_line_to_rect(pt1[0], pt1[1], pt2[0], pt2[1], crop_rect)
-                                if clipped is None:
-                                    continue
-                                c_p1 = (clipped[0], clipped[1])
-                                c_p2 = (clipped[2], clipped[3])
-                            else:
-                                c_p1, c_p2 = pt1, pt2
-                                
-                            self.msp.add_line(
-                                self._transform_point(c_p1, x_offset, page_height),
-                                self._transform_point(c_p2, x_offset, page_height),
-                                dxfattribs={'layer': 'PDF_GEOMETRY'}
-                            )
+                    if min_size > 0 and ITEM_EXTENT[item[0]](item) < min_size:
+                        continue
+                    handler(item, x_offset, page_height, crop_rect)
 
         # 2. Extract Text
         if include_text:
-            text_dict = page.get_text("dict", clip=crop_rect) if crop_rect else page.get_text("dict")
+            text_dict = page.get_text("dict", clip=crop_rect, flags=TEXT_FLAGS)
             for block in text_dict.get("blocks", []):
-                if block.get("type", -1) == 0: # Text block
-                    for line in block.get("lines", []):
-                        for span in line.get("spans", []):
-                            text = span.get("text", "")
-                            if not text.strip():
-                                continue
-                            
-                            # Font size and origin
-                            size = span.get("size", 10)
-                            origin = span.get("origin", (0, 0)) # (x, y)
-                            
-                            # Transform origin
-                            insert_point = self._transform_point(origin, x_offset, page_height)
-                            
-                            # Add MTEXT
+                for line in block.get("lines", []):
+                    for span in line.get("spans", []):
+                        text = span.get("text", "")
+                        if not text.strip():
+                            continue
+                        
+                        # Font size and origin
+                        size = span.get("size", 10)
+                        origin = span.get("origin", (0, 0)) # (x, y)
+                        
+                        # Transform origin
+                        insert_point = self._transform_point(origin, x_offset, page_height)
+                        
+                        # Add TEXT; a span is a single line, so MTEXT is only
+                        # needed if it somehow contains a line break
+                        if '\n' in text:
                             self.msp.add_mtext(
                                 text,
                                 dxfattribs={
@@ -242,16 +162,73 @@ class PDF2DXFConverter:
                                     'layer': 'PDF_TEXT'
                                 }
                             )
+                        else:
+                            # default alignment: insert is on the baseline, like the span origin
+                            self.msp.add_text(
+                                text,
+                                dxfattribs={
+                                    'height': size,
+                                    'insert': insert_point,
+                                    'layer': 'PDF_TEXT'
+                                }
+                            )
+
+    def _add_line_item(self, item, x_offset, page_height, crop_rect):
+        p1 = item[1]
+        p2 = item[2]
+        if crop_rect:
+            clipped = clip_line_to_rect(p1[0], p1[1], p2[0], p2[1], crop_rect)
+            if clipped is None:
+                return
+            p1, p2 = (clipped[0], clipped[1]), (clipped[2], clipped[3])
+        self.msp.add_line(
+            self._transform_point(p1, x_offset, page_height),
+            self._transform_point(p2, x_offset, page_height),
+            dxfattribs=GEOMETRY_ATTRS
+        )
+
+    def _add_curve_item(self, item, x_offset, page_height, crop_rect):
+        """Cubic Bezier"""
+        if crop_rect:
+            cx0, cy0, cx1, cy1 = crop_rect
+            for pt in item[1:5]:
+                if not (cx0 <= pt[0] <= cx1 and cy0 <= pt[1] <= cy1):
+                    return
+
+        # inline Y flip, no method call per control point
+        control_points = [(pt[0] + x_offset, page_height - pt[1]) for pt in item[1:5]]
+        self.msp.add_spline(control_points, degree=3, dxfattribs=GEOMETRY_ATTRS)
+
+    def _add_rect_item(self, item, x_offset, page_height, crop_rect):
+        x0, y0, x1, y1 = item[1]
+        p1 = (x0, y0)
+        p2 = (x1, y0)
+        p3 = (x1, y1)
+        p4 = (x0, y1)
+
+        # Convert rectangle to 4 clippable lines so crossing borders are correctly cropped
+        lines = [(p1, p2), (p2, p3), (p3, p4), (p4, p1)]
+        for pt1, pt2 in lines:
+            if crop_rect:
+                clipped = clip_line_to_rect(pt1[0], pt1[1], pt2[0], pt2[1], crop_rect)
+                if clipped is None:
+                    continue
+                c_p1 = (clipped[0], clipped[1])
+                c_p2 = (clipped[2], clipped[3])
+            else:
+                c_p1, c_p2 = pt1, pt2
+
+            self.msp.add_line(
+                self._transform_point(c_p1, x_offset, page_height),
+                self._transform_point(c_p2, x_offset, page_height),
+                dxfattribs=GEOMETRY_ATTRS
+            )
 
     def _transform_point(self, point, x_offset, page_height):
         """
         Transforms a PDF point (x, y) to DXF coordinates.
         Flips Y axis.
         """
-        # point might be a fitz.Point or tuple
-        x, y = point[0], point[1]
-        
-        # Flip Y: new_y = page_height - old_y
-        new_y = page_height - y
-        
-        return (x + x_offset, new_y)
+        # Only ever a Y flip plus a shift, no general matrix needed.
+        # point might be a fitz.Point or tuple; both index like a 2-tuple
+        return (point[0] + x_offset, page_height - point[1])
@@ -12,8 +12,8 @@ try:
 except ImportError:
     st_canvas = None
 
-# Add src to path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+# Add src to the front of the path so 'converter' resolves on the first lookup
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 try:
     from converter import PDF2DXFConverter
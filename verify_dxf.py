@@ -31,8 +31,11 @@ def verify_dxf(path):
         print(f"Invalid or corrupted DXF file: {path}")
         sys.exit(1)
 
-if __name__ == "__main__":
+def main():
     filename = "sample.dxf"
     if len(sys.argv) > 1:
         filename = sys.argv[1]
     verify_dxf(filename)
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-import shutil
+import zipfile
 import os
 
 def zip_plugin():
@@ -7,8 +7,17 @@ def zip_plugin():
     # Output zip file name (without extension)
     output_filename = input ("enter zipfile name (without extension): ")
     
-    # Create zip
-    shutil.make_archive(output_filename, 'zip', root_dir='.', base_dir=source_dir)
+    # Create zip in one walk; level 1 deflate is plenty for source files,
+    # and compiled caches are left out of the package
+    with zipfile.ZipFile(output_filename + ".zip", "w",
+                         compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        for root, dirs, files in os.walk(source_dir):
+            dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+            for name in sorted(files):
+                if name.endswith(".pyc"):
+                    continue
+                path = os.path.join(root, name)
+                zf.write(path, arcname=os.path.relpath(path, "."))
     print(f"Created {output_filename}.zip")
 
 if __name__ == "__main__":